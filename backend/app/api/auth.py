@@ -1,19 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 from app.database import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
-from app.core.security import verify_password, get_password_hash, validate_password, create_access_token, create_refresh_token
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, RefreshRequest
+from app.core.security import (
+    verify_password, get_password_hash, validate_password, create_access_token, create_refresh_token,
+    decode_token, revoke_token
+)
 from app.core.dependencies import get_current_active_user
+from app.core.rate_limit import RateLimiter
+from app.config import settings
+from app.services.token_revocation import token_revocation_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Credential endpoints share one per-IP bucket
+auth_rate_limit = Depends(RateLimiter(settings.RATE_LIMIT_AUTH, scope="auth"))
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[auth_rate_limit]
+)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     
@@ -70,7 +86,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         )
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[auth_rate_limit])
 async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user and return JWT tokens"""
     
@@ -118,6 +134,70 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
         )
 
 
+@router.post("/refresh", response_model=Token, dependencies=[auth_rate_limit])
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for a new token pair (rotation)
+    
+    The presented refresh token is revoked as part of the exchange, so each
+    refresh token can be used exactly once.
+    """
+    
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    payload = decode_token(request.refresh_token)
+    if payload is None or payload.get("type") != "refresh":
+        raise credentials_exception
+    
+    jti = payload.get("jti")
+    user_id = payload.get("user_id")
+    if not jti or user_id is None:
+        raise credentials_exception
+    
+    try:
+        if await token_revocation_service.is_revoked(db, jti):
+            # A rotated token being replayed suggests it leaked
+            logger.warning(f"Revoked refresh token reused for user_id={user_id}")
+            raise credentials_exception
+        
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        
+        await token_revocation_service.revoke(
+            db, jti, user.id, expires_at=datetime.utcfromtimestamp(payload["exp"])
+        )
+        await db.commit()
+        revoke_token(request.refresh_token)
+        
+        access_token = create_access_token(data={"user_id": user.id, "email": user.email})
+        refresh_token = create_refresh_token(data={"user_id": user.id, "email": user.email})
+        
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer"
+        }
+    
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # Lost a race with a concurrent refresh of the same token
+        await db.rollback()
+        raise credentials_exception
+    except Exception as e:
+        logger.error(f"Token refresh error: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Token refresh failed. Please try again."
+        )
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """Get current user information"""
@@ -1,32 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
+from sqlalchemy import select, func, insert, delete, literal, or_, and_
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+from datetime import datetime
+import base64
 from app.database import get_db
 from app.models.user import User
-from app.models.collection import Collection
+from app.models.collection import Collection, MAX_COLLECTION_SIZE
 from app.core.dependencies import get_current_active_user
-from app.schemas.pokemon import CollectionResponse, CollectionAddRequest
+from app.core.responses import etag_matches
+from app.schemas.pokemon import (
+    CollectionResponse, CollectionAddRequest, CollectionBulkRequest, CollectionBulkResponse
+)
+from app.services.pokemon_store import pokemon_store
+from app.services.collection_versions import bump_version, get_version, collection_etag
+from app.services.collection_bulk import CollectionConflict, apply_operations
+from app.services.collection_transfer import export_ndjson, import_ndjson
+from app.services.leaderboard import leaderboard_service
 
 router = APIRouter(prefix="/collection", tags=["Collection"])
 
-MAX_COLLECTION_SIZE = 15
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, collection_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a row"""
+    raw = f"{created_at.isoformat()}|{collection_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, collection_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(collection_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
 
 
 @router.get("/", response_model=List[CollectionResponse])
 async def get_collection(
+    response: Response,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get user's Pokémon collection"""
+    """Get user's Pokémon collection, newest first
     
-    result = await db.execute(
+    Pages are keyed on (created_at, id); when more rows follow, the cursor
+    for the next page is returned in the X-Next-Cursor header. Responses
+    carry an ETag derived from the collection version, and a matching
+    If-None-Match is answered with 304 before any rows are read.
+    """
+    
+    version, _ = await get_version(db, current_user.id)
+    etag = collection_etag(current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        set_cache_headers(not_modified, etag)
+        return not_modified
+    
+    query = (
         select(Collection)
+        .options(selectinload(Collection.pokemon))
         .where(Collection.user_id == current_user.id)
-        .order_by(Collection.created_at.desc())
+        .order_by(Collection.created_at.desc(), Collection.id.desc())
+        .limit(limit + 1)
     )
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Collection.created_at < cursor_created_at,
+            and_(Collection.created_at == cursor_created_at, Collection.id < cursor_id)
+        ))
+    
+    result = await db.execute(query)
     collections = result.scalars().all()
     
+    if len(collections) > limit:
+        collections = collections[:limit]
+        last = collections[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    set_cache_headers(response, etag)
+    
     return collections
 
 
@@ -36,69 +105,140 @@ async def add_to_collection(
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Add a Pokémon to user's collection"""
+    """Add a Pokémon to user's collection
     
-    # Check collection size limit
-    result = await db.execute(
+    Runs as a single INSERT ... SELECT that only produces a row while the
+    collection is below the cap; the unique (user_id, pokemon_name) index
+    rejects duplicates. Both checks happen inside the database, so
+    concurrent adds cannot overshoot the cap or create duplicates.
+    
+    Verified Pokémon data goes to the shared pokemon table and the
+    collection row only references it by pokemon_id; a client-supplied
+    payload PokeAPI does not confirm is kept on this row alone.
+    """
+    
+    shared_data = await pokemon_store.ensure(db, pokemon.pokemon_id, pokemon.pokemon_name)
+    client_data = pokemon.pokemon_data if shared_data is None else None
+    
+    columns = Collection.__table__.c
+    created_at = datetime.utcnow()
+    current_count = (
         select(func.count(Collection.id))
         .where(Collection.user_id == current_user.id)
+        .scalar_subquery()
     )
-    collection_count = result.scalar()
+    row = select(
+        literal(current_user.id, columns.user_id.type),
+        literal(pokemon.pokemon_name, columns.pokemon_name.type),
+        literal(pokemon.pokemon_id, columns.pokemon_id.type),
+        literal(created_at, columns.created_at.type),
+        literal(client_data, columns.pokemon_data.type),
+    ).where(current_count < MAX_COLLECTION_SIZE)
     
-    if collection_count >= MAX_COLLECTION_SIZE:
+    try:
+        result = await db.execute(
+            insert(Collection).from_select(
+                ["user_id", "pokemon_name", "pokemon_id", "created_at", "pokemon_data"], row
+            )
+        )
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Collection is full. Maximum {MAX_COLLECTION_SIZE} Pokémon allowed."
-        )
-    
-    # Check if Pokémon already in collection
-    result = await db.execute(
-        select(Collection)
-        .where(
-            Collection.user_id == current_user.id,
-            Collection.pokemon_name == pokemon.pokemon_name
+            detail="This Pokémon is already in your collection"
         )
-    )
-    existing = result.scalar_one_or_none()
     
-    if existing:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This Pokémon is already in your collection"
+            detail=f"Collection is full. Maximum {MAX_COLLECTION_SIZE} Pokémon allowed."
         )
     
-    # Add to collection
-    new_collection_item = Collection(
-        user_id=current_user.id,
-        pokemon_name=pokemon.pokemon_name,
-        pokemon_id=pokemon.pokemon_id,
-        pokemon_data=pokemon.pokemon_data
-    )
-    
-    db.add(new_collection_item)
+    await bump_version(db, current_user.id, 1)
+    await leaderboard_service.record_added(db, [(pokemon.pokemon_name, pokemon.pokemon_id)])
     await db.commit()
-    await db.refresh(new_collection_item)
     
-    return new_collection_item
+    return {
+        "id": result.lastrowid,
+        "user_id": current_user.id,
+        "pokemon_name": pokemon.pokemon_name,
+        "pokemon_id": pokemon.pokemon_id,
+        "pokemon_data": shared_data if shared_data is not None else client_data,
+        "created_at": created_at
+    }
+
+
+@router.post("/bulk", response_model=CollectionBulkResponse)
+async def bulk_update_collection(
+    request: CollectionBulkRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply several adds and removes in a single transaction
+    
+    See apply_operations for the batching and cap semantics.
+    """
+    
+    try:
+        results = await apply_operations(db, current_user.id, request.operations)
+    except CollectionConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Collection was modified concurrently. Please retry."
+        )
+    version, count = await get_version(db, current_user.id)
+    return {"results": results, "count": count, "version": version}
+
+
+@router.get("/export")
+async def export_collection(current_user: User = Depends(get_current_active_user)):
+    """Download the user's collection as NDJSON (streamed, one row per line)"""
+    return StreamingResponse(
+        export_ndjson(current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="collection-{current_user.id}.ndjson"'}
+    )
+
+
+@router.post("/import")
+async def import_collection(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Import an NDJSON collection export
+    
+    The body is parsed line by line as it is received and applied in
+    batched transactions, with the same cap and duplicate rules as bulk adds.
+    """
+    return await import_ndjson(request.stream(), current_user.id)
 
 
 @router.get("/count")
 async def get_collection_count(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get count of Pokémon in user's collection"""
+    """Get count of Pokémon in user's collection
     
-    result = await db.execute(
-        select(func.count(Collection.id))
-        .where(Collection.user_id == current_user.id)
-    )
-    count = result.scalar()
+    Answered from the collection version record, without counting rows.
+    """
+    
+    version, count = await get_version(db, current_user.id)
+    etag = collection_etag(current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        set_cache_headers(not_modified, etag)
+        return not_modified
     
+    set_cache_headers(response, etag)
     return {
         "count": count,
         "max": MAX_COLLECTION_SIZE,
-        "remaining": MAX_COLLECTION_SIZE - count
+        "remaining": MAX_COLLECTION_SIZE - count,
+        "version": version
     }
 
 
@@ -110,23 +250,23 @@ async def remove_from_collection(
 ):
     """Remove a Pokémon from user's collection"""
     
-    # Find collection item
+    await leaderboard_service.record_removed(db, current_user.id, [collection_id])
     result = await db.execute(
-        select(Collection)
+        delete(Collection)
         .where(
             Collection.id == collection_id,
             Collection.user_id == current_user.id
         )
     )
-    collection_item = result.scalar_one_or_none()
     
-    if not collection_item:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Collection item not found"
         )
     
-    await db.delete(collection_item)
+    await bump_version(db, current_user.id, -1)
     await db.commit()
     
     return None
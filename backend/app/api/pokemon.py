@@ -1,18 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from sqlalchemy import select
+from typing import List, Optional
+import asyncio
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User
-from app.core.dependencies import get_current_active_user
-from app.services.gemini_service import gemini_service
+from app.models.scan_event import ScanEvent
+from app.core.dependencies import get_current_active_user, get_streaming_user, get_user_from_token
+from app.core.rate_limit import RateLimiter, UserRateLimiter
+from app.core.admission import scan_admission
+from app.core.responses import dump_json, precompressed_json, trusted_json
+from app.config import settings
 from app.services.pokeapi_service import pokeapi_service
-from app.services.image_processor import image_processor
-from app.schemas.pokemon import PokemonResponse
+from app.services.scan_history import scan_history
+from app.services.scan_jobs import scan_jobs
+from app.services.live_scan import LiveScanSession
+from app.services.scan_pipeline import scan_batch, scan_image, scan_regions
+from app.schemas.pokemon import BatchScanResponse, PokemonResponse, RegionScanResponse, ScanEventResponse, ScanJobResponse
 
 router = APIRouter(prefix="/pokemon", tags=["Pokemon"])
 
+# Same bucket as the per-request scan limit; batch and region scans charge it per image or region
+scan_rate_limiter = RateLimiter(settings.RATE_LIMIT_SCAN, scope="scan")
 
-@router.post("/scan", response_model=PokemonResponse)
+
+async def read_image(file: UploadFile) -> bytes:
+    """Read an uploaded image, rejecting other file types with 400"""
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    return await file.read()
+
+
+@router.post(
+    "/scan",
+    response_model=PokemonResponse,
+    dependencies=[Depends(UserRateLimiter(settings.RATE_LIMIT_SCAN, scope="scan"))]
+)
 async def scan_pokemon(
+    request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
@@ -28,53 +58,244 @@ async def scan_pokemon(
     5. Return complete Pokémon information
     """
     
-    # Validate file type
-    if not file.content_type.startswith("image/"):
+    image_bytes = await read_image(file)
+    
+    # Bound concurrent scans; excess load is shed with 503 + Retry-After
+    async with scan_admission.slot():
+        pokemon_name, pokemon_data = await scan_image(current_user.id, image_bytes, mime_type=file.content_type)
+    
+    # Shaped by PokeAPIService already; skip response_model re-validation and
+    # serve the variant compressed when the entry was cached
+    return precompressed_json(request, pokemon_data, pokeapi_service.get_compressed(pokemon_name))
+
+
+@router.post(
+    "/scan/regions",
+    response_model=RegionScanResponse,
+    dependencies=[Depends(UserRateLimiter(settings.RATE_LIMIT_SCAN, scope="scan"))]
+)
+async def scan_pokemon_regions(
+    file: UploadFile = File(...),
+    max_regions: int = Query(settings.SCAN_MAX_REGIONS, ge=1, le=settings.SCAN_MAX_REGIONS),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Identify several Pokémon in one photo (e.g. a binder page)
+    
+    Detects up to max_regions object regions, identifies them in parallel
+    and returns one result per region with its bounding box. Each region
+    is charged against the RATE_LIMIT_SCAN budget and takes its own scan
+    admission slot.
+    """
+    
+    image_bytes = await read_image(file)
+    
+    async def charge(regions: int) -> None:
+        # The route dependency already took one token
+        if regions > 1:
+            await scan_rate_limiter.check(f"user:{current_user.id}", Response(), cost=regions - 1)
+    
+    regions = await scan_regions(current_user.id, image_bytes, max_regions, on_regions=charge)
+    
+    # Pokémon data is shaped by PokeAPIService already; skip re-validation
+    return trusted_json({"regions": regions})
+
+
+@router.post(
+    "/scan/batch",
+    response_model=BatchScanResponse,
+    dependencies=[Depends(UserRateLimiter(settings.RATE_LIMIT_SCAN_BATCH, scope="scan_batch"))]
+)
+async def scan_pokemon_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Scan up to SCAN_BATCH_MAX_FILES images in one request (e.g. importing cards)
+    
+    Identical images are scanned once and preprocessing runs in parallel;
+    returns one result per upload, in order. An upload that is not an
+    image or cannot be identified does not fail the batch. Each distinct
+    image is charged against the RATE_LIMIT_SCAN budget.
+    """
+    
+    if len(files) > settings.SCAN_BATCH_MAX_FILES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be an image"
+            detail=f"At most {settings.SCAN_BATCH_MAX_FILES} files per batch"
         )
     
-    # Read image bytes
-    image_bytes = await file.read()
+    images = [
+        await file.read() if file.content_type and file.content_type.startswith("image/") else None
+        for file in files
+    ]
     
-    # Step 1: Preprocess image with OpenCV
-    try:
-        processed_image = image_processor.preprocess_image(image_bytes)
-    except Exception as e:
-        print(f"Image preprocessing failed, using original: {e}")
-        processed_image = image_bytes
+    distinct = len({image for image in images if image})
+    if distinct:
+        await scan_rate_limiter.check(f"user:{current_user.id}", Response(), cost=distinct)
     
-    # Step 2: Identify Pokémon using Gemini
-    pokemon_name = await gemini_service.identify_pokemon(processed_image)
-    print(f"[DEBUG SCAN] Gemini identified Pokemon: '{pokemon_name}'")
-    print(f"[DEBUG SCAN] Pokemon name length: {len(pokemon_name) if pokemon_name else 'None'}")
-    print(f"[DEBUG SCAN] Pokemon name bytes: {pokemon_name.encode() if pokemon_name else 'None'}")
+    # Not held under scan_admission: the batch would skew its latency
+    # estimate; Gemini's concurrency limit bounds the model requests instead
+    results = await scan_batch(current_user.id, images)
+    for result, file in zip(results, files):
+        result["filename"] = file.filename
     
-    if not pokemon_name:
-        print("[DEBUG SCAN] Gemini failed to identify a Pokemon in the image")
+    # Pokémon data is shaped by PokeAPIService already; skip re-validation
+    return trusted_json({
+        "results": results,
+        "unique_images": sum(1 for image, r in zip(images, results) if image is not None and r["duplicate_of"] is None),
+    })
+
+
+@router.post(
+    "/scan/jobs",
+    response_model=ScanJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(UserRateLimiter(settings.RATE_LIMIT_SCAN, scope="scan"))]
+)
+async def create_scan_job(
+    response: Response,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue a scan and return its job id right away
+    
+    Poll GET /pokemon/scan/jobs/{id} or follow GET /pokemon/scan/jobs/{id}/events
+    for progress. When the queue is full the request is rejected with 503
+    and Retry-After.
+    """
+    
+    image_bytes = await read_image(file)
+    job = await scan_jobs.submit(current_user.id, image_bytes)
+    response.headers["Location"] = f"{settings.API_V1_PREFIX}/pokemon/scan/jobs/{job['id']}"
+    return job
+
+
+@router.get("/scan/jobs/{job_id}", response_model=ScanJobResponse)
+async def get_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the state of a scan job; the result is included once it is done
+    """
+    
+    job = await scan_jobs.get(job_id, current_user.id)
+    if job is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Could not identify a Pokémon in the image"
+            detail="Scan job not found"
         )
+    return job
+
+
+@router.get("/scan/jobs/{job_id}/events")
+async def stream_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_streaming_user)
+):
+    """
+    Follow a scan job as Server-Sent Events
     
-    # Step 3: Fetch Pokémon data from PokeAPI
-    print(f"[DEBUG SCAN] Fetching PokeAPI data for: '{pokemon_name}'")
-    pokemon_data = await pokeapi_service.get_pokemon_data(pokemon_name)
-    print(f"[DEBUG SCAN] PokeAPI returned data: {pokemon_data is not None}")
+    Sends a "progress" event with the job state after each stage (decoded,
+    preprocessed, identified, enriched), then a final "done" or "failed"
+    event, and closes. Comments are sent as keep-alives while waiting.
+    Holds no database connection while streaming.
+    """
     
-    if not pokemon_data:
-        print(f"[DEBUG] PokeAPI failed to find Pokemon: {pokemon_name}")
+    if await scan_jobs.get(job_id, current_user.id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Pokémon '{pokemon_name}' not found in PokeAPI"
+            detail="Scan job not found"
         )
     
-    return pokemon_data
+    async def events():
+        keepalive = settings.SCAN_JOB_SSE_KEEPALIVE_SECONDS
+        async for job in scan_jobs.watch(job_id, current_user.id, keepalive):
+            if job is None:
+                yield b": keep-alive\n\n"
+                continue
+            event = job["status"] if job["status"] in ("done", "failed") else "progress"
+            data = dump_json(jsonable_encoder(job))
+            yield b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/scan/live")
+async def live_scan(websocket: WebSocket):
+    """
+    Continuous scanning of a camera stream
+    
+    The first message must be {"type": "auth", "token": "<access token>"}
+    (browsers cannot set headers on WebSockets). Then send frames as binary
+    messages; results are pushed back as they resolve. Frames arriving while
+    one is being recognized replace each other, and frames showing the same
+    scene as the last recognized one are skipped. See LiveScanSession.
+    """
+    await websocket.accept()
+    
+    try:
+        message = await asyncio.wait_for(
+            websocket.receive_json(), timeout=settings.SCAN_LIVE_AUTH_TIMEOUT_SECONDS
+        )
+        token = message.get("token") if message.get("type") == "auth" else None
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, KeyError, ValueError, AttributeError):
+        token = None
+    
+    user = None
+    if isinstance(token, str):
+        async with AsyncSessionLocal() as db:
+            user = await get_user_from_token(token, db)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    
+    await websocket.send_json({"type": "ready"})
+    await LiveScanSession(websocket, user.id).run()
+
+
+@router.get("/history", response_model=List[ScanEventResponse])
+async def get_scan_history(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the user's scan history, newest first
+    
+    When more entries follow, the cursor for the next page is returned in
+    the X-Next-Cursor header.
+    """
+    
+    # Make the user's own recent scans visible before reading
+    if cursor is None and scan_history.has_pending(current_user.id):
+        await scan_history.flush()
+    
+    query = select(ScanEvent).where(ScanEvent.user_id == current_user.id)
+    if cursor is not None:
+        query = query.where(ScanEvent.id < cursor)
+    result = await db.execute(query.order_by(ScanEvent.id.desc()).limit(limit + 1))
+    events = result.scalars().all()
+    
+    if len(events) > limit:
+        events = events[:limit]
+        response.headers["X-Next-Cursor"] = str(events[-1].id)
+    return events
 
 
 @router.get("/search/{pokemon_name}", response_model=PokemonResponse)
 async def search_pokemon(
+    request: Request,
     pokemon_name: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -90,7 +311,7 @@ async def search_pokemon(
             detail=f"Pokémon '{pokemon_name}' not found"
         )
     
-    return pokemon_data
+    return precompressed_json(request, pokemon_data, pokeapi_service.get_compressed(pokemon_name))
 
 
 @router.get("/test-pokeapi", tags=["Debug"])
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, status, Path, Query, Request, Response
+from fastapi.responses import FileResponse
+from typing import Optional
+from app.config import settings
+from app.core.responses import etag_matches
+from app.services.sprite_store import sprite_store, SPRITE_VARIANTS, THUMBNAIL_FORMATS
+
+router = APIRouter(prefix="/sprites", tags=["Sprites"])
+
+
+def _choose_format(accept: str, requested: Optional[str]) -> str:
+    """Requested format, else the best supported one the client accepts (png as fallback)"""
+    supported = sprite_store.supported_formats()
+    if requested is not None:
+        if requested not in supported:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format '{requested}' is not available; use one of {', '.join(supported)}"
+            )
+        return requested
+    for image_format in supported:
+        if THUMBNAIL_FORMATS[image_format][0] in accept:
+            return image_format
+    return "png"
+
+
+@router.get(
+    "/{pokemon_id}/{variant}",
+    response_class=FileResponse,
+    responses={200: {"content": {"image/png": {}, "image/webp": {}, "image/avif": {}}}, 304: {}, 404: {}}
+)
+async def get_sprite(
+    request: Request,
+    pokemon_id: int = Path(..., ge=1, le=100000),
+    variant: str = Path(..., description=f"One of: {', '.join(SPRITE_VARIANTS)}"),
+    size: Optional[int] = Query(None, description="Thumbnail size in pixels (longest side)"),
+    fmt: Optional[str] = Query(None, alias="format", description="Thumbnail format: avif, webp or png; negotiated from Accept when omitted"),
+):
+    """
+    Pokémon sprite served from the local sprite cache
+    
+    The original image is fetched from the sprite source once and stored on
+    disk. With ``size``, a downscaled thumbnail is rendered once per size and
+    format and served from disk afterwards. Responses carry long-lived
+    Cache-Control headers and a content-based ETag.
+    """
+    
+    if variant not in SPRITE_VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown sprite variant '{variant}'"
+        )
+    if size is not None and size not in settings.SPRITE_THUMBNAIL_SIZES_LIST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Size must be one of {settings.SPRITE_THUMBNAIL_SIZES}"
+        )
+    
+    try:
+        digest = await sprite_store.original(pokemon_id, variant)
+    except Exception as e:
+        print(f"[SPRITE ERROR] {pokemon_id}/{variant}: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not fetch sprite"
+        )
+    if digest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No {variant} sprite for Pokémon {pokemon_id}"
+        )
+    
+    headers = {"Cache-Control": f"public, max-age={settings.SPRITE_CACHE_MAX_AGE}"}
+    if size is None:
+        path, media_type, etag = sprite_store.object_path(digest), "image/png", f'"{digest[:32]}"'
+    else:
+        image_format = _choose_format(request.headers.get("accept", ""), fmt)
+        if fmt is None:
+            headers["Vary"] = "Accept"
+        etag = f'"{digest[:32]}-{size}.{image_format}"'
+        media_type = THUMBNAIL_FORMATS[image_format][0]
+        try:
+            path = await sprite_store.thumbnail(digest, size, image_format)
+        except Exception as e:
+            print(f"[SPRITE ERROR] thumbnail {digest}-{size}.{image_format}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not render sprite thumbnail"
+            )
+    headers["ETag"] = etag
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query
+from app.config import settings
+from app.services.leaderboard import leaderboard_service
+from app.services.scan_pipeline import cascade_stats
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("/leaderboard")
+async def get_leaderboard(limit: int = Query(10, ge=1, le=settings.LEADERBOARD_SIZE)):
+    """
+    Most collected Pokémon and the collection-size distribution
+    
+    Served from an in-memory snapshot refreshed in the background, so the
+    cost does not depend on the number of users or collection rows.
+    """
+    return leaderboard_service.snapshot(limit)
+
+
+@router.get("/scan-cascade")
+async def get_scan_cascade_stats():
+    """
+    Recognition attempts and hit rate per cascade tier since this process started
+    
+    A low thumbnail hit rate means most scans pay for two model requests;
+    raise SCAN_THUMBNAIL_SIZE or disable the cascade.
+    """
+    return cascade_stats.snapshot()
@@ -1,25 +1,48 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
+    # Environment ("development" or "production")
+    ENVIRONMENT: str = "development"
+    
     # Database
+    DB_BACKEND: str = "sqlite"  # "sqlite" or "mysql"
+    DB_URL: str = ""  # Full SQLAlchemy URL; overrides DB_BACKEND and the DB_* fields when set
     DB_HOST: str = "localhost"
     DB_PORT: int = 3306
     DB_USER: str = "root"
     DB_PASSWORD: str = "password"  # Default for development
     DB_NAME: str = "poketab"
+    DB_ECHO: Optional[bool] = None  # Log SQL; defaults to on in development only
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # Seconds; keeps MySQL connections under wait_timeout
+    DB_POOL_PREWARM: int = 2  # Connections opened per worker at startup
+    
+    # SQLite tuning (applied on every new connection)
+    SQLITE_PATH: str = "./poketab.db"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production"  # Default for development
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified-claims cache size (0 disables)
+    
+    # Refresh token revocation filter
+    REVOCATION_FILTER_PATH: str = "./revocation_filter.bin"
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.01
+    REVOCATION_PRUNE_SECONDS: float = 3600.0  # Expired revocations are deleted and the filter rebuilt this often
     
     # Gemini API
     GEMINI_API_KEY: str = ""  # Optional, can be empty
+    GEMINI_MAX_CONCURRENCY: int = 8  # Concurrent model requests per process
     
     # Redis
     REDIS_HOST: str = "localhost"
@@ -32,20 +55,107 @@ class Settings(BaseSettings):
     
     # Rate Limiting
     RATE_LIMIT_SCAN: str = "10/minute"
+    RATE_LIMIT_SCAN_BATCH: str = "2/minute"  # Per batch request, whatever its size
     RATE_LIMIT_AUTH: str = "5/minute"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared)
+    RATE_LIMIT_MAX_KEYS: int = 10000  # Max in-memory buckets before LRU eviction
+    
+    # Scan admission control (per process)
+    SCAN_MAX_IN_FLIGHT: int = 8  # Upper bound for the adaptive concurrency limit
+    SCAN_MIN_IN_FLIGHT: int = 1
+    SCAN_MAX_QUEUE: int = 32
+    SCAN_QUEUE_TIMEOUT: float = 10.0  # Seconds a scan may wait for a slot
+    SCAN_TARGET_LATENCY: float = 5.0  # Seconds; slower scans shrink the limit
+    
+    SCAN_MAX_REGIONS: int = 6  # Upper bound for /pokemon/scan/regions
+    SCAN_BATCH_MAX_FILES: int = 20  # Uploads accepted by /pokemon/scan/batch
+    
+    # Recognition cascade: a small thumbnail first, the full preprocessed
+    # frame only when the thumbnail is not recognized or does not resolve
+    SCAN_CASCADE_ENABLED: bool = True
+    SCAN_THUMBNAIL_SIZE: int = 320  # Longest side in pixels
+    SCAN_THUMBNAIL_QUALITY: int = 80  # JPEG quality
+    
+    # Asynchronous scan jobs (/pokemon/scan/jobs, per process)
+    SCAN_JOB_WORKERS: int = 4  # Jobs processed concurrently
+    SCAN_JOB_QUEUE_SIZE: int = 64  # Jobs waiting beyond this are rejected with 503
+    SCAN_JOB_TTL_SECONDS: float = 600.0  # Finished jobs stay available for this long
+    SCAN_JOB_SSE_KEEPALIVE_SECONDS: float = 15.0
+    
+    # Continuous scanning over WebSocket (/pokemon/scan/live)
+    SCAN_LIVE_AUTH_TIMEOUT_SECONDS: float = 10.0  # For the first (auth) message
+    SCAN_LIVE_MAX_FRAME_BYTES: int = 2 * 1024 * 1024
+    SCAN_LIVE_HASH_THRESHOLD: int = 6  # Frames within this many bits (of 64) show the same scene
+    
+    # Startup
+    PREWARM_ON_STARTUP: bool = True  # Load heavy dependencies in the background after startup
+    
+    # Shared Pokédex snapshot (build with build_pokedex_snapshot.py; empty path disables)
+    POKEDEX_SNAPSHOT_PATH: str = "./pokedex.snapshot"
+    POKEDEX_SNAPSHOT_CHECK_SECONDS: float = 5.0  # How often workers look for a replaced file
+    
+    # Sprite proxy (/sprites); the source may also be a local directory with the same layout
+    SPRITE_SOURCE_URL: str = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/"
+    SPRITE_CACHE_DIR: str = "./sprite_cache"
+    SPRITE_THUMBNAIL_SIZES: str = "96,192,384"  # Allowed ?size= values, in pixels
+    SPRITE_CACHE_MAX_AGE: int = 30 * 86400  # Cache-Control max-age, seconds
+    SPRITE_MAX_BYTES: int = 5 * 1024 * 1024  # Larger upstream images are refused
+    
+    # Production server (python -m app.server)
+    PORT: int = 8000
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_WORKERS: int = 0  # 0 = 1 with the memory rate limiter, one per available CPU with redis
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_TIMEOUT: int = 65  # Seconds; keep above the load balancer's idle timeout
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # Per worker; further connections get 503
+    SERVER_MAX_REQUESTS: Optional[int] = None  # Recycle a worker after this many requests
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # Proxies trusted for X-Forwarded-For
+    SERVER_ACCESS_LOG: bool = True
+    
+    # Scan history (write-behind)
+    SCAN_HISTORY_BATCH_SIZE: int = 100  # Flush once this many events are buffered
+    SCAN_HISTORY_FLUSH_SECONDS: float = 5.0  # ...or after this long
+    SCAN_HISTORY_MAX_BUFFER: int = 10000  # Oldest events are dropped beyond this
+    
+    # Leaderboard
+    LEADERBOARD_SIZE: int = 50
+    LEADERBOARD_REFRESH_SECONDS: float = 30.0  # In-memory snapshot refresh
+    LEADERBOARD_RECONCILE_SECONDS: float = 3600.0  # Full recount from collections
     
     @property
     def DATABASE_URL(self):
         """Construct database URL using SQLAlchemy URL object"""
-        # Using SQLite as fallback since MySQL is not available
-        from sqlalchemy.engine import make_url
-        return make_url("sqlite+aiosqlite:///./poketab.db")
+        from sqlalchemy.engine import URL, make_url
+        
+        if self.DB_URL:
+            return make_url(self.DB_URL)
+        if self.DB_BACKEND == "mysql":
+            return URL.create(
+                "mysql+aiomysql",
+                username=self.DB_USER,
+                password=self.DB_PASSWORD,
+                host=self.DB_HOST,
+                port=self.DB_PORT,
+                database=self.DB_NAME,
+                query={"charset": "utf8mb4"},
+            )
+        return make_url(f"sqlite+aiosqlite:///{self.SQLITE_PATH}")
+    
+    @property
+    def IS_PRODUCTION(self) -> bool:
+        return self.ENVIRONMENT.lower() == "production"
     
     @property
     def CORS_ORIGINS_LIST(self) -> List[str]:
         """Parse CORS origins into list"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def SPRITE_THUMBNAIL_SIZES_LIST(self) -> List[int]:
+        """Parse allowed thumbnail sizes into list"""
+        return [int(size) for size in self.SPRITE_THUMBNAIL_SIZES.split(",") if size.strip()]
+    
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 
@@ -0,0 +1,143 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, status
+from app.config import settings
+
+
+class AdmissionController:
+    """Adaptive concurrency limit with a bounded, deadline-aware wait queue
+
+    At most ``limit`` requests run at once; up to ``max_queue`` more wait in
+    FIFO order for at most ``queue_timeout`` seconds. A request is rejected
+    with 503 straight away when the queue is full or when the expected wait
+    (queue depth x average latency / limit) already exceeds its deadline,
+    instead of piling up and timing out later.
+
+    The limit adapts AIMD-style: every completion under ``target_latency``
+    raises it by 1/limit, a completion over target cuts it by
+    ``decrease_factor`` (at most once per average latency, so one burst of
+    slow responses counts as a single congestion signal).
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        target_latency: float = 5.0,
+        decrease_factor: float = 0.75,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.rejected = 0
+        self._latency_ewma = target_latency / 2
+        self._last_decrease = 0.0
+        self._waiters: deque = deque()
+
+    def _reject(self, retry_after: float) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scanner is busy. Please try again shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def _expected_wait(self) -> float:
+        return (len(self._waiters) + 1) * self._latency_ewma / max(1.0, self.limit)
+
+    async def _acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        expected_wait = self._expected_wait()
+        if len(self._waiters) >= self.max_queue or expected_wait > self.queue_timeout:
+            raise self._reject(expected_wait)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # Slot was handed over right at the deadline
+            self._discard(waiter)
+            raise self._reject(self._expected_wait())
+        except BaseException:
+            # Client went away while queued; give back a slot if we were handed one
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _record_latency(self, latency: float) -> None:
+        self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+        now = time.monotonic()
+        if latency > self.target_latency:
+            if now - self._last_decrease >= self._latency_ewma:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block
+
+        Raises:
+            HTTPException: 503 with Retry-After when the request cannot be
+            admitted within the queue deadline
+        """
+        await self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_latency(time.monotonic() - started)
+            self._release_slot()
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "latency_ewma": round(self._latency_ewma, 3),
+        }
+
+
+# Shared limiter for the scan pipeline (preprocessing + Gemini + PokeAPI)
+scan_admission = AdmissionController(
+    max_limit=settings.SCAN_MAX_IN_FLIGHT,
+    min_limit=settings.SCAN_MIN_IN_FLIGHT,
+    max_queue=settings.SCAN_MAX_QUEUE,
+    queue_timeout=settings.SCAN_QUEUE_TIMEOUT,
+    target_latency=settings.SCAN_TARGET_LATENCY,
+)
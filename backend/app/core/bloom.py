@@ -0,0 +1,68 @@
+import hashlib
+import math
+import struct
+from typing import Optional
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings
+
+    Membership checks never give false negatives, so a miss can be trusted
+    without further lookups; a hit only means "maybe" and must be confirmed
+    against the authoritative store.
+    """
+
+    _MAGIC = b"PTBF"
+    _HEADER = struct.Struct("<4sIIQd")  # magic, num_bits, num_hashes, count, created_at
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self.created_at = 0.0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def is_saturated(self) -> bool:
+        """True once more items were added than the filter was sized for"""
+        return self.count > self.capacity
+
+    def to_bytes(self) -> bytes:
+        header = self._HEADER.pack(self._MAGIC, self.num_bits, self.num_hashes, self.count, self.created_at)
+        return header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, capacity: int) -> Optional["BloomFilter"]:
+        """Restore a filter saved with to_bytes, or None if the data is unusable"""
+        if len(data) < cls._HEADER.size:
+            return None
+        magic, num_bits, num_hashes, count, created_at = cls._HEADER.unpack_from(data)
+        bits = data[cls._HEADER.size:]
+        if magic != cls._MAGIC or len(bits) != (num_bits + 7) // 8:
+            return None
+
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.capacity = capacity
+        bloom.count = count
+        bloom.created_at = created_at
+        bloom._bits = bytearray(bits)
+        return bloom
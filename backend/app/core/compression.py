@@ -0,0 +1,76 @@
+import gzip
+from typing import Iterable, NamedTuple, Optional
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Only gzip variants are produced without it
+    brotli = None
+
+# Densest settings, for variants built offline (Pokédex snapshot)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Cache entries are compressed while the server handles traffic; brotli 11
+# costs tens of milliseconds per payload, these keep most of the size gain
+LIVE_GZIP_LEVEL = 6
+LIVE_BROTLI_QUALITY = 5
+
+
+class Precompressed(NamedTuple):
+    """Compressed variants of one JSON body; br is None when brotli is not installed"""
+    gzip: bytes
+    br: Optional[bytes] = None
+
+
+def compress_variants(body: bytes, gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY) -> Precompressed:
+    """Compress a response body once for every supported Content-Encoding"""
+    return Precompressed(
+        gzip=gzip.compress(body, compresslevel=gzip_level, mtime=0),
+        br=brotli.compress(body, quality=brotli_quality) if brotli is not None else None,
+    )
+
+
+def negotiate_encoding(accept_encoding: str, variants: Precompressed) -> Optional[str]:
+    """Pick "br" or "gzip" for an Accept-Encoding header, or None for the raw body
+
+    Brotli wins over gzip at equal preference; codings with q=0 are refused.
+    """
+    if not accept_encoding:
+        return None
+    quality = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        quality[coding.strip()] = q
+    wildcard = quality.get("*", 0.0)
+
+    best, best_q = None, 0.0
+    for coding in ("br", "gzip"):
+        if getattr(variants, coding) is None:
+            continue
+        q = quality.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that skips paths serving already compressed media (e.g. sprite images)"""
+
+    def __init__(self, app: ASGIApp, exclude_prefixes: Iterable[str] = (), **options) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, **options)
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.core.security import decode_token
 from typing import Optional
@@ -10,34 +10,67 @@ from typing import Optional
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user"""
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_user_from_token(token: str, db: AsyncSession) -> Optional[User]:
+    """Resolve an access token to its user, or None if it is invalid
     
-    token = credentials.credentials
+    Used by get_current_user and by WebSocket endpoints, which cannot send
+    an Authorization header.
+    """
     payload = decode_token(token)
     
     if payload is None:
-        raise credentials_exception
+        return None
+    
+    # Refresh tokens are only accepted by /auth/refresh
+    if payload.get("type") == "refresh":
+        return None
     
     user_id: Optional[int] = payload.get("user_id")
     if user_id is None:
-        raise credentials_exception
+        return None
     
     # Fetch user from database
     result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    return result.scalar_one_or_none()
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Dependency to get current authenticated user"""
+    
+    user = await get_user_from_token(credentials.credentials, db)
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return user
+
+
+async def get_streaming_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """get_current_user for streaming responses
+    
+    Looks the user up in a session of its own that is closed before the
+    endpoint runs. A get_db session would stay checked out until the
+    response (e.g. a long Server-Sent Events stream) finishes.
+    """
+    
+    async with AsyncSessionLocal() as db:
+        user = await get_user_from_token(credentials.credentials, db)
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
@@ -0,0 +1,182 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Tuple
+from fastapi import Depends, HTTPException, Request, Response, status
+from app.config import settings
+from app.core.dependencies import get_current_active_user
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(limit: str) -> Tuple[int, float]:
+    """Parse a limit such as "10/minute" into (burst capacity, tokens per second)"""
+    count, _, period = limit.partition("/")
+    period = period.strip().lower().rstrip("s")
+    if period not in _PERIODS:
+        raise ValueError(f"Unsupported rate limit period in {limit!r}")
+    capacity = int(count)
+    return capacity, capacity / _PERIODS[period]
+
+
+class InMemoryBucketStore:
+    """Token buckets kept in a bounded LRU dict
+
+    Each bucket is a three-item list. A bucket idle long enough to have refilled
+    completely carries no information, so those are evicted from the cold
+    end of the LRU on every call, and the least recently used bucket is
+    dropped once max_keys is reached.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # {key: [tokens, last_refill_ts, idle_ttl]}
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            _, (_, last, idle_ttl) = next(iter(self._buckets.items()))
+            if now - last < idle_ttl and len(self._buckets) < self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        """Take cost tokens; returns (allowed, tokens left)
+
+        A cost above capacity is allowed once the bucket is full and leaves
+        it in debt, so large requests are not locked out but still pay.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            bucket = [float(capacity), now, capacity / rate]
+            self._buckets[key] = bucket
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= min(cost, capacity):
+            bucket[0] -= cost
+            # A bucket in debt takes longer than usual to refill
+            bucket[2] = (capacity - min(bucket[0], 0)) / rate
+            return True, bucket[0]
+        return False, bucket[0]
+
+
+class RedisBucketStore:
+    """Token buckets shared between processes through Redis
+
+    The refill-and-take step runs as a Lua script, so it is atomic across
+    workers; keys expire once the bucket would be full again.
+    """
+
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= math.min(cost, capacity) then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - math.min(tokens, 0)) / rate * 1000))
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, fallback: InMemoryBucketStore):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        self._take = self.client.register_script(self._SCRIPT)
+        self.fallback = fallback
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = await self._take(keys=[f"ratelimit:{key}"], args=[capacity, rate, cost])
+            return bool(allowed), float(tokens)
+        except Exception as e:
+            # Keep limiting per process rather than failing requests
+            logger.warning(f"Redis rate limiter unavailable, using local buckets: {e}")
+            return await self.fallback.take(key, capacity, rate, cost)
+
+
+def _create_store():
+    memory_store = InMemoryBucketStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketStore(fallback=memory_store)
+    return memory_store
+
+
+bucket_store = _create_store()
+
+
+def client_ip(request: Request) -> str:
+    """Client address as seen by the server (run uvicorn with --proxy-headers behind a proxy)"""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """Dependency enforcing a token-bucket limit per client IP
+
+    Usage:
+        @router.post("/login", dependencies=[Depends(RateLimiter(settings.RATE_LIMIT_AUTH, "auth"))])
+    """
+
+    def __init__(self, limit: str, scope: str):
+        self.limit = limit
+        self.scope = scope
+        self.capacity, self.rate = parse_rate(limit)
+
+    async def check(self, key: str, response: Response, cost: int = 1) -> None:
+        """Charge cost tokens to key's bucket
+
+        Raises:
+            HTTPException: 429 with Retry-After when the bucket is short
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        allowed, tokens = await bucket_store.take(f"{self.scope}:{key}", self.capacity, self.rate, cost)
+        reset = math.ceil((self.capacity - tokens) / self.rate)
+        headers = {
+            "X-RateLimit-Limit": str(self.capacity),
+            "X-RateLimit-Remaining": str(max(0, int(tokens))),
+            "X-RateLimit-Reset": str(reset),
+        }
+
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil((min(cost, self.capacity) - tokens) / self.rate)))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded ({self.limit}). Please try again later.",
+                headers=headers,
+            )
+
+        response.headers.update(headers)
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        await self.check(f"ip:{client_ip(request)}", response)
+
+
+class UserRateLimiter(RateLimiter):
+    """Dependency enforcing a token-bucket limit per authenticated user"""
+
+    async def __call__(
+        self,
+        response: Response,
+        current_user: User = Depends(get_current_active_user)
+    ) -> None:
+        await self.check(f"user:{current_user.id}", response)
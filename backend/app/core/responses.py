@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from app.core.compression import Precompressed, negotiate_encoding
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+def dump_json(content: Any) -> bytes:
+    """Encode JSON-compatible content, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """App-wide default response class: same output as JSONResponse, faster encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def trusted_json(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Return data built by our own services without response_model validation
+
+    FastAPI validates and re-serializes anything an endpoint returns against
+    its response_model, unless the endpoint returns a Response. Use this for
+    payloads whose shape the service already guarantees (e.g. PokeAPI data
+    shaped by PokeAPIService); keep response_model on the route so the
+    OpenAPI schema is unchanged.
+    """
+    return Response(content=dump_json(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def precompressed_json(
+    request: Request,
+    content: Any,
+    variants: Optional[Precompressed],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Like trusted_json, but serve a stored gzip/brotli variant when the client accepts one
+
+    GZipMiddleware passes responses that already carry Content-Encoding
+    through untouched, so the body is not compressed again per request.
+    Without variants (or for clients accepting neither encoding) this is
+    trusted_json.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), variants) if variants else None
+    if encoding is None:
+        return trusted_json(content, headers=headers)
+    headers = dict(headers or {})
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(content=getattr(variants, encoding), headers=headers, media_type="application/json")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (or is "*")"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -1,18 +1,21 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.config import settings
+from app.core.token_cache import TokenCache
 
-# Password hashing context
-# Use bcrypt for secure password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context, created on first use (see get_pwd_context)
+_pwd_context = None
 
 # Constants
 MAX_PASSWORD_LENGTH = 72  # bcrypt maximum password length
 MIN_PASSWORD_LENGTH = 8
 
+# Verified claims cache, so repeat requests with the same token skip jwt.decode
+token_cache = TokenCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+
 
 def validate_password(password: str) -> None:
     """Validate password length before hashing
@@ -35,9 +38,21 @@ def validate_password(password: str) -> None:
         )
 
 
+def get_pwd_context():
+    """Password hashing context; passlib and bcrypt load on first use
+    
+    Use bcrypt for secure password hashing
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -49,7 +64,7 @@ def get_password_hash(password: str) -> str:
     Returns:
         The bcrypt hash of the password
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -67,18 +82,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def create_refresh_token(data: dict) -> str:
-    """Create JWT refresh token"""
+    """Create JWT refresh token
+    
+    Each refresh token carries a unique jti so it can be revoked on rotation.
+    """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def decode_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
+def _verify_token(token: str) -> Optional[dict]:
+    """Decode and verify JWT token without consulting the cache"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Decode and verify JWT token
+    
+    Verified claims are cached by token digest until the token expires, so
+    only the first request with a given token pays for signature checking.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    payload = _verify_token(token)
+    if payload is not None:
+        token_cache.set(token, payload)
+    return payload
+
+
+def revoke_token(token: str) -> None:
+    """Revocation hook: forget a token's cached claims"""
+    token_cache.purge_token(token)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Revocation hook: forget cached claims for every token of a user"""
+    token_cache.purge_user(user_id)
@@ -0,0 +1,80 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class TokenCache:
+    """Bounded in-memory cache of verified JWT claims
+
+    Entries are keyed by a digest of the raw token (the token itself is never
+    stored) and expire at the token's own ``exp`` claim, so a cached lookup
+    never outlives a signature check that would have succeeded anyway.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        # {digest: (claims, exp_timestamp)} in least-recently-used order
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token, or None if missing or expired"""
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(claims)
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        """Store verified claims until the token's exp claim"""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_entries <= 0:
+            # Tokens without an expiry are not cached
+            return
+
+        key = self._digest(token)
+        self._entries[key] = (dict(claims), float(expires_at))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def purge_token(self, token: str) -> None:
+        """Drop a single token (e.g. on logout or refresh-token rotation)"""
+        self._entries.pop(self._digest(token), None)
+
+    def purge_user(self, user_id: int) -> int:
+        """Drop every cached token belonging to a user
+
+        Returns:
+            Number of entries removed
+        """
+        stale = [key for key, (claims, _) in self._entries.items() if claims.get("user_id") == user_id]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def purge_expired(self) -> int:
+        """Drop all entries whose exp has passed"""
+        now = time.time()
+        stale = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,105 @@
+import importlib
+import logging
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Heavy modules that are safe to import before forking workers: importing
+# them creates no threads, sockets or clients
+PRELOAD_MODULES = (
+    "numpy",
+    "cv2",
+    "google.genai",
+    "google.genai.types",
+    "httpx",
+    "passlib.context",
+)
+
+
+def _warm_image_processor() -> None:
+    from app.services.image_processor import image_processor
+    image_processor.warm()
+
+
+def _warm_gemini() -> None:
+    from app.services.gemini_service import gemini_service
+    gemini_service.warm()
+
+
+def _warm_pokeapi() -> None:
+    from app.services.pokeapi_service import pokeapi_service
+    pokeapi_service.client
+
+
+def _warm_password_hashing() -> None:
+    from app.core.security import get_pwd_context
+    # Loads the bcrypt backend without paying for a full hash
+    get_pwd_context().handler("bcrypt").get_backend()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "image_processor": _warm_image_processor,
+    "gemini": _warm_gemini,
+    "pokeapi": _warm_pokeapi,
+    "password_hashing": _warm_password_hashing,
+}
+
+
+def preload_modules() -> None:
+    """Import PRELOAD_MODULES; used by the launcher before forking workers"""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Preloading {name} failed: {e}")
+
+
+async def warm_pokemon_cache() -> int:
+    """Seed the PokeAPI cache from verified rows of the pokemon table
+
+    Skipped when the cache already holds entries (e.g. seeded before fork)
+    or when a Pokédex snapshot is available, which workers share instead.
+
+    Returns:
+        Number of Pokémon loaded
+    """
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models.pokemon import Pokemon
+    from app.services.pokeapi_service import pokeapi_service
+    from app.services.pokedex_snapshot import pokedex_snapshot
+
+    if pokeapi_service.cache_size() or len(pokedex_snapshot):
+        return 0
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Pokemon.name, Pokemon.data)
+            .where(Pokemon.verified.is_(True))
+            .order_by(Pokemon.updated_at.desc())
+            .limit(pokeapi_service.CACHE_MAX_ENTRIES)
+        )
+        entries = {name: data for name, data in result.all()}
+    await pokeapi_service.prime_cache(entries)
+    return len(entries)
+
+
+def prewarm() -> Dict[str, float]:
+    """Load the lazily imported dependencies and singletons ahead of first use
+
+    Blocking; run it in a thread from async code. A failing step is logged
+    and skipped, the dependency then loads on first use as usual.
+
+    Returns:
+        Seconds spent per step
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS.items():
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        timings[name] = time.perf_counter() - started
+    logger.info(f"Warm-up finished: {', '.join(f'{k}={v * 1000:.0f}ms' for k, v in timings.items())}")
+    return timings
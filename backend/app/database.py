@@ -1,16 +1,58 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import os
+from typing import Optional
+from sqlalchemy import event, insert
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import settings
 
-# Create async engine
-print(f"Connecting to database: {settings.DATABASE_URL.render_as_string(hide_password=True)}")
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+
+def engine_options(url: URL) -> dict:
+    """Engine options for the configured environment and database backend"""
+    echo = settings.DB_ECHO if settings.DB_ECHO is not None else not settings.IS_PRODUCTION
+    options = {"echo": echo}
+    
+    if url.get_backend_name() == "sqlite":
+        # Local file: nothing to ping or recycle, writers serialize anyway
+        if url.database not in (None, "", ":memory:"):
+            options.update(pool_size=5, max_overflow=0)
+    else:
+        options.update(
+            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for a concurrent web workload
+    
+    WAL lets readers proceed while a write is in progress, synchronous=NORMAL
+    only fsyncs at checkpoints (safe under WAL), mmap avoids read syscalls and
+    busy_timeout makes writers wait for the lock instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def create_db_engine(url: Optional[URL] = None, sqlite_pragmas: bool = True) -> AsyncEngine:
+    """Create an async engine using the database profile for the current settings"""
+    url = url if url is not None else settings.DATABASE_URL
+    db_engine = create_async_engine(url, **engine_options(url))
+    if sqlite_pragmas and url.get_backend_name() == "sqlite":
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+# Create async engine (no connection is made until first use)
+engine = create_db_engine()
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -24,6 +66,17 @@ AsyncSessionLocal = async_sessionmaker(
 # Base class for models
 Base = declarative_base()
 
+# Set by app.server once the parent process has migrated the schema
+SCHEMA_READY_ENV = "POKETAB_SCHEMA_READY"
+
+
+def insert_ignore(db: AsyncSession, table, values: dict):
+    """INSERT that silently skips rows conflicting with a unique key"""
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table).values(**values).on_conflict_do_nothing()
+    return insert(table).values(**values).prefix_with("IGNORE")
+
 
 async def get_db():
     """Dependency for getting database sessions"""
@@ -34,12 +87,37 @@ async def get_db():
             await session.close()
 
 
-async def init_db():
-    """Initialize database tables"""
+async def warm_pool(connections: int) -> None:
+    """Open pool connections ahead of the first requests"""
+    async def checkout():
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    
+    await asyncio.gather(*(checkout() for _ in range(connections)))
+
+
+async def init_db() -> bool:
+    """Initialize database tables
+    
+    Skipped in server workers whose parent process already migrated the
+    schema (SCHEMA_READY_ENV is set), so workers do not race each other.
+    
+    Returns:
+        True if the schema is up to date
+    """
+    if os.environ.get(SCHEMA_READY_ENV) == "1":
+        print("Database schema already initialized by the server process")
+        return True
     try:
+        from app.migrations import upgrade_schema
+        
+        print(f"Connecting to database: {engine.url.render_as_string(hide_password=True)}")
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade_schema)
         print("✓ Database initialized successfully")
+        return True
     except Exception as e:
         print(f"⚠️  Database initialization warning (may be OK): {str(e)}")
         # Don't raise - let the app continue even if DB init has issues
+        return False
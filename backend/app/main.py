@@ -1,12 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.gzip import GZipMiddleware
 from starlette.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 from app.config import settings
-from app.database import init_db
-from app.api import auth, pokemon, collection
+from app.database import init_db, warm_pool, AsyncSessionLocal
+from app.api import auth, pokemon, collection, stats, sprites
+from app.services.token_revocation import token_revocation_service
+from app.services.leaderboard import leaderboard_service
+from app.services.scan_history import scan_history
+from app.services.scan_jobs import scan_jobs
+from app.services.pokeapi_service import pokeapi_service
+from app.core.warmup import prewarm, warm_pokemon_cache
+from app.core.responses import FastJSONResponse
+from app.core.compression import SelectiveGZipMiddleware
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,9 +27,40 @@ async def lifespan(app: FastAPI):
     print("Starting up...")
     await init_db()
     print("Database initialized")
+    async with AsyncSessionLocal() as db:
+        await token_revocation_service.load(db)
+    leaderboard_task = asyncio.create_task(leaderboard_service.run())
+    scan_history_task = asyncio.create_task(scan_history.run())
+    scan_jobs_task = asyncio.create_task(scan_jobs.run())
+    revocation_task = asyncio.create_task(token_revocation_service.run())
+    warmup_task = None
+    if settings.PREWARM_ON_STARTUP:
+        try:
+            await warm_pool(settings.DB_POOL_PREWARM)
+            await warm_pokemon_cache()
+        except Exception as e:
+            logger.warning(f"Startup warm-up failed: {e}")
+        # Off the request path: the app serves traffic while OpenCV/Gemini load
+        warmup_task = asyncio.create_task(asyncio.to_thread(prewarm))
     yield
     # Shutdown
     print("Shutting down...")
+    leaderboard_task.cancel()
+    scan_history_task.cancel()
+    scan_jobs_task.cancel()
+    revocation_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    # Let the cancellations land before the final flush, so an interrupted
+    # write has requeued its events
+    await asyncio.gather(leaderboard_task, scan_history_task, scan_jobs_task, revocation_task, return_exceptions=True)
+    abandoned = await scan_jobs.shutdown()
+    if abandoned:
+        print(f"Marked {abandoned} unfinished scan jobs as failed")
+    written = await scan_history.flush()
+    print(f"Flushed {written} buffered scan events")
+    await pokeapi_service.close()
+    token_revocation_service.save()
 
 
 # Create FastAPI app
@@ -29,12 +68,19 @@ app = FastAPI(
     title="PokéTab API",
     description="Backend API for PokéTab - Pokémon Scanning and Collection Platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add GZIP compression middleware FIRST (before other middleware)
-# This compresses responses to reduce bandwidth by ~70%
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# This compresses responses to reduce bandwidth by ~70%. Pokémon data is
+# served precompressed (Content-Encoding already set), which it passes through;
+# sprite images are already compressed and skip it entirely
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    exclude_prefixes=[f"{settings.API_V1_PREFIX}/sprites/"],
+    minimum_size=1000
+)
 
 # Configure CORS
 print(f"Configuring CORS with origins: {settings.CORS_ORIGINS_LIST}")
@@ -45,7 +91,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"],
     allow_headers=["*"],
-    expose_headers=["Content-Type", "Authorization"],
+    expose_headers=[
+        "Content-Type", "Authorization",
+        "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset",
+        "ETag", "X-Next-Cursor"
+    ],
     max_age=3600,
 )
 
@@ -53,6 +103,8 @@ app.add_middleware(
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(pokemon.router, prefix=settings.API_V1_PREFIX)
 app.include_router(collection.router, prefix=settings.API_V1_PREFIX)
+app.include_router(stats.router, prefix=settings.API_V1_PREFIX)
+app.include_router(sprites.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -0,0 +1,116 @@
+"""
+Lightweight in-place schema upgrades for existing databases
+
+Base.metadata.create_all only creates missing tables, so changes to tables
+that already exist (such as a poketab.db created by an older release) are
+applied here. Every step is idempotent and runs on startup after
+create_all, on both SQLite and MySQL.
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from app.models.collection import Collection
+from app.models.pokemon import Pokemon
+
+logger = logging.getLogger(__name__)
+
+
+def _dedupe_collections(connection: Connection) -> int:
+    """Remove duplicate (user_id, pokemon_name) rows, keeping the oldest"""
+    # The derived table keeps MySQL from rejecting a subquery on the target table
+    result = connection.execute(text(
+        "DELETE FROM collections WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM collections GROUP BY user_id, pokemon_name) AS keep"
+        ")"
+    ))
+    return result.rowcount or 0
+
+
+def _add_collection_indexes(connection: Connection) -> None:
+    existing = {index["name"] for index in inspect(connection).get_indexes("collections")}
+    for index in Collection.__table__.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            removed = _dedupe_collections(connection)
+            if removed:
+                logger.warning(f"Removed {removed} duplicate collection rows before adding {index.name}")
+        index.create(connection)
+        logger.info(f"Created index {index.name}")
+
+
+def _add_collection_client_data(connection: Connection) -> None:
+    """Add the per-row collections.pokemon_data column if an earlier upgrade went without it"""
+    columns = {column["name"] for column in inspect(connection).get_columns("collections")}
+    if "pokemon_data" not in columns:
+        connection.execute(text("ALTER TABLE collections ADD COLUMN pokemon_data JSON"))
+        logger.info("Added collections.pokemon_data")
+
+
+def _unshare_unverified_pokemon(connection: Connection) -> None:
+    """Move unverified payloads out of the shared pokemon table
+
+    Client-supplied data must not be served to other users. Each unverified
+    row is copied back onto the collection rows of that Pokémon that have
+    no payload of their own, then deleted; the next verified PokeAPI fetch
+    recreates it.
+    """
+    pokemon = Pokemon.__table__
+    collections = Collection.__table__
+    unverified = connection.execute(
+        pokemon.select().with_only_columns(pokemon.c.pokemon_id, pokemon.c.data)
+        .where(pokemon.c.verified.is_(False))
+    ).all()
+    for pokemon_id, data in unverified:
+        connection.execute(
+            collections.update()
+            .where(collections.c.pokemon_id == pokemon_id, collections.c.pokemon_data.is_(None))
+            .values(pokemon_data=data)
+        )
+        connection.execute(pokemon.delete().where(pokemon.c.pokemon_id == pokemon_id))
+    if unverified:
+        logger.info(f"Moved {len(unverified)} unverified Pokémon payloads back to their collection rows")
+
+
+def _drop_superseded_client_data(connection: Connection) -> None:
+    """Clear per-row payloads of Pokémon that now have verified shared data"""
+    cleared = connection.execute(text(
+        "UPDATE collections SET pokemon_data = NULL WHERE pokemon_data IS NOT NULL "
+        "AND pokemon_id IN (SELECT pokemon_id FROM pokemon WHERE verified = 1)"
+    ))
+    if cleared.rowcount:
+        logger.info(f"Cleared {cleared.rowcount} collection payloads superseded by verified data")
+
+
+def _normalize_sqlite_timestamps(connection: Connection) -> None:
+    """Rewrite second-precision created_at values in SQLite's microsecond format
+
+    Rows filled by the old CURRENT_TIMESTAMP default lack the fractional part,
+    which breaks lexicographic keyset comparisons against bound datetimes.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text(
+        "UPDATE collections SET created_at = strftime('%Y-%m-%d %H:%M:%f', created_at) || '000' "
+        "WHERE length(created_at) = 19"
+    ))
+
+
+def _backfill_collection_versions(connection: Connection) -> None:
+    """Create version records for users whose collections predate them"""
+    connection.execute(text(
+        "INSERT INTO collection_versions (user_id, version, item_count) "
+        "SELECT user_id, 1, COUNT(*) FROM collections "
+        "WHERE user_id NOT IN (SELECT user_id FROM collection_versions) "
+        "GROUP BY user_id"
+    ))
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """Bring an existing schema up to date (run via AsyncConnection.run_sync)"""
+    _add_collection_indexes(connection)
+    _add_collection_client_data(connection)
+    _unshare_unverified_pokemon(connection)
+    _drop_superseded_client_data(connection)
+    _normalize_sqlite_timestamps(connection)
+    _backfill_collection_versions(connection)
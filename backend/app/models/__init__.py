@@ -1,4 +1,10 @@
 from app.models.user import User
 from app.models.collection import Collection
+from app.models.collection_version import CollectionVersion
+from app.models.pokemon import Pokemon
+from app.models.pokemon_count import PokemonCount
+from app.models.revoked_token import RevokedToken
+from app.models.scan_event import ScanEvent
+from app.models.scan_job import ScanJob
 
-__all__ = ["User", "Collection"]
+__all__ = ["User", "Collection", "CollectionVersion", "Pokemon", "PokemonCount", "RevokedToken", "ScanEvent", "ScanJob"]
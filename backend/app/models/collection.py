@@ -1,22 +1,44 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+# Maximum number of Pokémon a single user may collect
+MAX_COLLECTION_SIZE = 15
+
 
 class Collection(Base):
     """Collection model for storing user's Pokémon"""
     __tablename__ = "collections"
+    __table_args__ = (
+        # One row per Pokémon per user, enforced by the database
+        Index("uq_collections_user_pokemon", "user_id", "pokemon_name", unique=True),
+        # Serves the per-user count and newest-first listing
+        Index("ix_collections_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     pokemon_name = Column(String(100), nullable=False)
     pokemon_id = Column(Integer, nullable=False)
-    
-    # Store cached Pokémon data to reduce PokeAPI calls
-    pokemon_data = Column(JSON, nullable=True)
+    # Client-supplied payload, kept on this row only (never shared) for
+    # Pokémon that PokeAPI has not verified yet
+    client_data = Column("pokemon_data", JSON(none_as_null=True), nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationship to user
     user = relationship("User", back_populates="collections")
+    
+    # Shared Pokémon data; must be loaded explicitly (e.g. selectinload) in async code
+    pokemon = relationship(
+        "Pokemon",
+        primaryjoin="foreign(Collection.pokemon_id) == Pokemon.pokemon_id",
+        viewonly=True,
+        lazy="raise"
+    )
+    
+    @property
+    def pokemon_data(self):
+        """Pokémon data from the shared pokemon table, else the row's own client payload"""
+        return self.pokemon.data if self.pokemon is not None else self.client_data
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.database import Base
+
+
+class CollectionVersion(Base):
+    """Per-user collection version and size, maintained on every add/remove
+
+    Lets polling clients revalidate with ETags and lets the count endpoint
+    answer without scanning the collections table.
+    """
+    __tablename__ = "collection_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
+    item_count = Column(Integer, nullable=False, default=0)
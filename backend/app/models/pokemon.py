@@ -0,0 +1,31 @@
+import hashlib
+import json
+from typing import Any, Dict
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Pokemon(Base):
+    """Shared Pokémon data referenced by collection rows
+
+    One row per Pokémon instead of one JSON copy per collected entry.
+    ``version`` is bumped whenever ``data`` changes; ``verified`` marks data
+    fetched from PokeAPI by the server. Only verified rows are written:
+    client-supplied payloads stay on the collection row that sent them.
+    """
+    __tablename__ = "pokemon"
+
+    pokemon_id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100), nullable=False, index=True)
+    data = Column(JSON, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    verified = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """Stable digest of a Pokémon payload"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
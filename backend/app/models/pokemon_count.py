@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class PokemonCount(Base):
+    """Number of users holding each Pokémon, maintained alongside collection writes"""
+    __tablename__ = "pokemon_counts"
+
+    pokemon_name = Column(String(100), primary_key=True)
+    pokemon_id = Column(Integer, nullable=False)
+    collector_count = Column(Integer, nullable=False, default=0, index=True)
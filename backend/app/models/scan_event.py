@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class ScanEvent(Base):
+    """One /pokemon/scan attempt, written in batches by the scan history buffer
+
+    scanned_at is stamped when the scan finishes (naive UTC), not when the
+    batch is flushed.
+    """
+    __tablename__ = "scan_events"
+    __table_args__ = (
+        # Serves the per-user newest-first history listing
+        Index("ix_scan_events_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    scanned_at = Column(DateTime, nullable=False)
+    pokemon_name = Column(String(100), nullable=True)  # None when nothing was identified
+    pokemon_id = Column(Integer, nullable=True)
+    success = Column(Boolean, nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    preprocess_tier = Column(String(20), nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from app.database import Base
+
+
+class ScanJob(Base):
+    """State of an asynchronous scan job, shared by all worker processes
+
+    The process that accepted the job runs it and writes each status change
+    here, so the job can be polled through any worker. Stage-level progress
+    is only kept in the owning process' memory. Rows are deleted
+    SCAN_JOB_TTL_SECONDS after the job finished.
+    """
+    __tablename__ = "scan_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(16), nullable=False)  # queued, running, done or failed
+    stage = Column(String(16), nullable=True)  # Last completed pipeline stage
+    pokemon_name = Column(String(100), nullable=True)
+    result = Column(JSON, nullable=True)  # PokeAPI data when done
+    error_status = Column(Integer, nullable=True)
+    error_detail = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)  # Naive UTC
+    finished_at = Column(DateTime, nullable=True)
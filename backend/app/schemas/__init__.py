@@ -1,4 +1,4 @@
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, RefreshRequest
 from app.schemas.pokemon import PokemonScanRequest, PokemonResponse, CollectionResponse
 
 __all__ = [
@@ -6,6 +6,7 @@ __all__ = [
     "UserLogin", 
     "UserResponse",
     "Token",
+    "RefreshRequest",
     "PokemonScanRequest",
     "PokemonResponse",
     "CollectionResponse"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -67,8 +67,111 @@ class CollectionResponse(BaseModel):
         from_attributes = True
 
 
+class ScanEventResponse(BaseModel):
+    """Schema for a scan history entry"""
+    id: int
+    scanned_at: datetime
+    pokemon_name: Optional[str] = None
+    pokemon_id: Optional[int] = None
+    success: bool
+    latency_ms: int
+    cache_hit: bool
+    preprocess_tier: str
+    
+    class Config:
+        from_attributes = True
+
+
+class ScanJobError(BaseModel):
+    """Why a scan job failed; status_code is what /pokemon/scan would have returned"""
+    status_code: int
+    detail: str
+
+
+class ScanJobResponse(BaseModel):
+    """Schema for an asynchronous scan job"""
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    stage: Optional[Literal["decoded", "preprocessed", "identified", "enriched"]] = None
+    pokemon_name: Optional[str] = None
+    result: Optional[PokemonResponse] = None
+    error: Optional[ScanJobError] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class RegionBox(BaseModel):
+    """Bounding box in pixels of the uploaded image"""
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class RegionScanResult(BaseModel):
+    """Identification of one region of a multi-Pokémon photo"""
+    box: RegionBox
+    status: Literal["found", "not_found", "not_identified"]
+    pokemon_name: Optional[str] = None
+    pokemon: Optional[PokemonResponse] = None
+
+
+class RegionScanResponse(BaseModel):
+    """Schema for a multi-region scan, largest region first"""
+    regions: List[RegionScanResult]
+
+
+class BatchScanResult(BaseModel):
+    """Outcome for one upload of a batch scan"""
+    index: int
+    filename: Optional[str] = None
+    status: Literal["found", "not_found", "not_identified", "invalid"]
+    pokemon_name: Optional[str] = None
+    pokemon: Optional[PokemonResponse] = None
+    duplicate_of: Optional[int] = None  # Index of the identical upload that was scanned
+    detail: Optional[str] = None
+
+
+class BatchScanResponse(BaseModel):
+    """Schema for a batch scan; results are in upload order"""
+    results: List[BatchScanResult]
+    unique_images: int
+
+
 class CollectionAddRequest(BaseModel):
     """Schema for adding Pokémon to collection"""
     pokemon_name: str
     pokemon_id: int
     pokemon_data: Optional[Dict[str, Any]] = None
+
+
+class CollectionBulkOperation(BaseModel):
+    """Single add or remove inside a bulk collection request"""
+    op: Literal["add", "remove"]
+    # For "add"
+    pokemon_name: Optional[str] = None
+    pokemon_id: Optional[int] = None
+    pokemon_data: Optional[Dict[str, Any]] = None
+    # For "remove"
+    collection_id: Optional[int] = None
+
+
+class CollectionBulkRequest(BaseModel):
+    """Schema for applying several collection changes in one transaction"""
+    operations: List[CollectionBulkOperation] = Field(..., min_length=1, max_length=50)
+
+
+class CollectionBulkItemResult(BaseModel):
+    """Outcome of one bulk operation, in request order"""
+    index: int
+    op: str
+    status: Literal["added", "removed", "duplicate", "not_found", "collection_full", "invalid"]
+    detail: Optional[str] = None
+    item: Optional[CollectionResponse] = None
+
+
+class CollectionBulkResponse(BaseModel):
+    """Schema for bulk collection response"""
+    results: List[CollectionBulkItemResult]
+    count: int
+    version: int
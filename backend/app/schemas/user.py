@@ -34,6 +34,11 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token"""
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     """Schema for token payload"""
     user_id: Optional[int] = None
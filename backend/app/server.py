@@ -0,0 +1,239 @@
+"""
+Production entry point: python -m app.server
+
+Runs the app under uvicorn with settings-driven workers, event loop, HTTP
+parser and connection limits. The parent process migrates the database
+once, so workers do not race each other running migrations. On platforms
+with fork() it also preloads the heavy dependencies and seeds the PokeAPI
+cache once, then forks the workers, so every worker starts with warm
+modules and caches (shared copy-on-write) and only has to open its own
+database connections. Workers that exit (e.g. after SERVER_MAX_REQUESTS)
+are replaced.
+
+For development use `uvicorn app.main:app --reload` instead.
+"""
+import asyncio
+import importlib
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+import uvicorn
+from app.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# A worker that dies sooner than this after starting is respawned with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+# Worker exit code when the app failed to start (same as uvicorn's)
+STARTUP_FAILURE = 3
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs allowed by a cgroup (v2 or v1) CPU quota, or None when unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPU cores this process may use: its affinity mask, capped by a container CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, int(quota))
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    """SERVER_WORKERS, or the default for the rate limit backend
+    
+    Rate limit buckets are per process unless RATE_LIMIT_BACKEND=redis, so
+    N workers would let every user make N times the configured requests.
+    The default is therefore one worker with the memory backend and one
+    per available CPU with redis.
+    """
+    shared_limits = settings.RATE_LIMIT_BACKEND == "redis"
+    if settings.SERVER_WORKERS > 0:
+        if settings.SERVER_WORKERS > 1 and not shared_limits:
+            logger.warning(
+                f"SERVER_WORKERS={settings.SERVER_WORKERS} with RATE_LIMIT_BACKEND={settings.RATE_LIMIT_BACKEND}: "
+                f"rate limits are enforced per worker, so each is effectively multiplied by the worker count"
+            )
+        return settings.SERVER_WORKERS
+    return available_cpus() if shared_limits else 1
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> dict:
+    """uvicorn options shared by the fork and fallback launch paths"""
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.PORT,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "lifespan": "on",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "limit_max_requests": settings.SERVER_MAX_REQUESTS,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        "server_header": False,
+    }
+
+
+def _mark_schema_ready(ready: bool) -> None:
+    from app.database import SCHEMA_READY_ENV
+
+    # Inherited by forked and spawned workers; their lifespan then skips migrations
+    if ready:
+        os.environ[SCHEMA_READY_ENV] = "1"
+
+
+async def _migrate() -> None:
+    from app.database import init_db, engine
+
+    _mark_schema_ready(await init_db())
+    await engine.dispose()
+
+
+async def _prefork_warmup() -> None:
+    from app.database import init_db, engine
+    from app.core.warmup import warm_pokemon_cache
+
+    _mark_schema_ready(await init_db())
+    loaded = await warm_pokemon_cache()
+    logger.info(f"Pre-fork warm-up: {loaded} Pokémon cached")
+    # Connections must not be shared with the forked workers
+    await engine.dispose()
+
+
+def prefork_warmup() -> None:
+    """Import the app and warm fork-safe state in the parent process"""
+    started = time.perf_counter()
+    importlib.import_module("app.main")
+    from app.core.warmup import preload_modules
+
+    preload_modules()
+    asyncio.run(_prefork_warmup())
+    logger.info(f"Pre-fork warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> int:
+    """Serve until shutdown; returns the process exit code"""
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception("Worker crashed")
+        return 1
+    return 0 if server.started else STARTUP_FAILURE
+
+
+def _supervise(config: uvicorn.Config, sock: socket.socket, workers: int) -> int:
+    """Fork the workers, replace the ones that exit, stop them all on SIGTERM/SIGINT"""
+    children: Dict[int, float] = {}
+    stopping = False
+    exit_code = 0
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Drop the supervisor's handlers; uvicorn installs its own for a graceful shutdown
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os._exit(_run_worker(config, sock))
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker [{pid}]")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if code == STARTUP_FAILURE:
+            # Replacing it would fail the same way
+            logger.error(f"Worker [{pid}] failed to start, shutting down")
+            exit_code = STARTUP_FAILURE
+            stop(None, None)
+            continue
+        logger.warning(f"Worker [{pid}] exited with status {code}, replacing it")
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        spawn()
+
+    logger.info("All workers stopped")
+    return exit_code
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    workers = worker_count()
+    options = server_options()
+    logger.info(
+        f"Starting {workers} worker(s) on {options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']})"
+    )
+
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn spawns fresh worker processes, each warms
+        # itself; the schema is migrated here once so they do not race
+        asyncio.run(_migrate())
+        uvicorn.run("app.main:app", workers=workers, **options)
+        return 0
+
+    prefork_warmup()
+    config = uvicorn.Config("app.main:app", workers=workers, **options)
+    sock = config.bind_socket()
+    if workers == 1:
+        return _run_worker(config, sock)
+    return _supervise(config, sock, workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
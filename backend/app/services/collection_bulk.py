@@ -0,0 +1,146 @@
+from typing import List, Dict, Any
+from datetime import datetime
+from sqlalchemy import select, insert, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.collection import Collection, MAX_COLLECTION_SIZE
+from app.schemas.pokemon import CollectionBulkOperation
+from app.services.pokemon_store import pokemon_store
+from app.services.collection_versions import bump_version
+from app.services.leaderboard import leaderboard_service
+
+
+class CollectionConflict(Exception):
+    """A concurrent writer broke the collection cap or uniqueness; the transaction was rolled back"""
+
+
+async def apply_operations(
+    db: AsyncSession,
+    user_id: int,
+    operations: List[CollectionBulkOperation]
+) -> List[Dict[str, Any]]:
+    """Apply several adds and removes for one user in a single transaction
+    
+    Removes are applied before adds so they free room under the cap. The
+    cap and duplicates are checked once against the current rows, writes go
+    out as one batched DELETE and one batched INSERT, and the version is
+    bumped once. Each operation gets its own result; failed operations do
+    not abort the others.
+    
+    Raises:
+        CollectionConflict: if a concurrent writer broke the cap or uniqueness
+    """
+    
+    results = [{"index": i, "op": op.op, "status": None} for i, op in enumerate(operations)]
+    
+    # Current state: one read of the user's (small, capped) collection
+    result = await db.execute(
+        select(Collection.id, Collection.pokemon_name)
+        .where(Collection.user_id == user_id)
+    )
+    rows = result.all()
+    ids_by_name = {row.pokemon_name: row.id for row in rows}
+    existing_ids = set(ids_by_name.values())
+    
+    # Plan removes
+    remove_ids = set()
+    for i, op in enumerate(operations):
+        if op.op != "remove":
+            continue
+        if op.collection_id is None:
+            results[i].update(status="invalid", detail="collection_id is required")
+        elif op.collection_id in existing_ids and op.collection_id not in remove_ids:
+            remove_ids.add(op.collection_id)
+            results[i]["status"] = "removed"
+        else:
+            results[i].update(status="not_found", detail="Collection item not found")
+    
+    removed_names = {name for name, item_id in ids_by_name.items() if item_id in remove_ids}
+    taken_names = set(ids_by_name) - removed_names
+    free_slots = MAX_COLLECTION_SIZE - len(taken_names)
+    
+    # Plan adds
+    to_add = []
+    for i, op in enumerate(operations):
+        if op.op != "add":
+            continue
+        if not op.pokemon_name or op.pokemon_id is None:
+            results[i].update(status="invalid", detail="pokemon_name and pokemon_id are required")
+        elif op.pokemon_name in taken_names:
+            results[i].update(status="duplicate", detail="This Pokémon is already in your collection")
+        elif free_slots <= 0:
+            results[i].update(
+                status="collection_full",
+                detail=f"Collection is full. Maximum {MAX_COLLECTION_SIZE} Pokémon allowed."
+            )
+        else:
+            taken_names.add(op.pokemon_name)
+            free_slots -= 1
+            to_add.append(i)
+    
+    # Shared Pokémon rows first; all PokeAPI lookups finish (concurrently)
+    # before the transaction's first write. Unverified client payloads are
+    # kept on the user's own rows only.
+    requested = {}
+    for i in to_add:
+        requested.setdefault(operations[i].pokemon_id, operations[i].pokemon_name)
+    shared_data = await pokemon_store.ensure_many(db, requested)
+    pokemon_data = {
+        i: shared_data[operations[i].pokemon_id]
+        if shared_data[operations[i].pokemon_id] is not None else operations[i].pokemon_data
+        for i in to_add
+    }
+    
+    created_at = datetime.utcnow()
+    try:
+        if remove_ids:
+            await leaderboard_service.record_removed(db, user_id, remove_ids)
+            await db.execute(
+                delete(Collection)
+                .where(Collection.user_id == user_id, Collection.id.in_(remove_ids))
+            )
+        if to_add:
+            await db.execute(insert(Collection), [
+                {
+                    "user_id": user_id,
+                    "pokemon_name": operations[i].pokemon_name,
+                    "pokemon_id": operations[i].pokemon_id,
+                    "client_data": None if shared_data[operations[i].pokemon_id] is not None else pokemon_data[i],
+                    "created_at": created_at,
+                }
+                for i in to_add
+            ])
+        
+        # Re-read inside the transaction to pick up new ids and catch concurrent writers
+        result = await db.execute(
+            select(Collection.id, Collection.pokemon_name)
+            .where(Collection.user_id == user_id)
+        )
+        ids_by_name = {row.pokemon_name: row.id for row in result.all()}
+        if len(ids_by_name) > MAX_COLLECTION_SIZE:
+            await db.rollback()
+            raise CollectionConflict(f"Collection of user {user_id} exceeds {MAX_COLLECTION_SIZE} items")
+        
+        if remove_ids or to_add:
+            await bump_version(db, user_id, len(to_add) - len(remove_ids))
+            await leaderboard_service.record_added(
+                db, [(operations[i].pokemon_name, operations[i].pokemon_id) for i in to_add]
+            )
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise CollectionConflict(f"Collection of user {user_id} was modified concurrently") from e
+    
+    for i in to_add:
+        op = operations[i]
+        results[i]["status"] = "added"
+        results[i]["item"] = {
+            "id": ids_by_name[op.pokemon_name],
+            "user_id": user_id,
+            "pokemon_name": op.pokemon_name,
+            "pokemon_id": op.pokemon_id,
+            "pokemon_data": pokemon_data[i],
+            "created_at": created_at
+        }
+    
+    return results
@@ -0,0 +1,177 @@
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models.collection import Collection
+from app.models.pokemon import Pokemon
+from app.models.user import User
+from app.schemas.pokemon import CollectionBulkOperation
+from app.services.collection_bulk import CollectionConflict, apply_operations
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_FETCH_ROWS = 500
+IMPORT_BATCH_SIZE = 100
+MAX_LINE_BYTES = 256 * 1024
+IMPORT_CONFLICT_RETRIES = 2  # Retries of a user's batch when a concurrent writer interferes
+
+
+async def export_ndjson(user_id: Optional[int] = None, include_data: bool = True) -> AsyncIterator[bytes]:
+    """Stream collection rows as NDJSON, one JSON object per line
+
+    Rows come from a server-side cursor fetched EXPORT_FETCH_ROWS at a time
+    and are flushed in ~64 KB chunks, so memory stays flat regardless of how
+    many rows are exported. With user_id=None every user's rows are
+    exported (admin backup).
+
+    The generator opens its own session because it outlives the request's
+    dependencies when used in a StreamingResponse.
+    """
+    columns = [
+        Collection.id, Collection.user_id, Collection.pokemon_name,
+        Collection.pokemon_id, Collection.created_at
+    ]
+    query = select(*columns)
+    if include_data:
+        query = query.add_columns(Pokemon.data, Collection.client_data).outerjoin(
+            Pokemon, Pokemon.pokemon_id == Collection.pokemon_id
+        )
+    if user_id is not None:
+        query = query.where(Collection.user_id == user_id)
+    query = query.order_by(Collection.id).execution_options(yield_per=EXPORT_FETCH_ROWS)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        buffer = bytearray()
+        async for row in result:
+            record = {
+                "id": row.id,
+                "user_id": row.user_id,
+                "pokemon_name": row.pokemon_name,
+                "pokemon_id": row.pokemon_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            if include_data:
+                record["pokemon_data"] = row.data if row.data is not None else row.client_data
+            buffer += json.dumps(record, separators=(",", ":")).encode()
+            buffer += b"\n"
+            if len(buffer) >= EXPORT_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[bytes]]:
+    """Split a byte stream into lines without buffering more than one line
+
+    Yields None in place of a line that exceeds max_line_bytes.
+    """
+    pending = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not oversized:
+                    pending += chunk[start:]
+                    if len(pending) > max_line_bytes:
+                        oversized = True
+                        pending.clear()
+                break
+            if oversized:
+                yield None
+            else:
+                pending += chunk[start:newline]
+                yield None if len(pending) > max_line_bytes else bytes(pending)
+            pending.clear()
+            oversized = False
+            start = newline + 1
+    if oversized:
+        yield None
+    elif pending:
+        yield bytes(pending)
+
+
+async def _apply_batch(batch: List[dict], user_id: Optional[int], summary: Dict[str, int]) -> None:
+    """Apply one batch of parsed records, one transaction per user in the batch"""
+    by_user: Dict[int, List[CollectionBulkOperation]] = defaultdict(list)
+    for record in batch:
+        by_user[user_id if user_id is not None else record["user_id"]].append(record["op"])
+
+    async with AsyncSessionLocal() as db:
+        if user_id is None:
+            result = await db.execute(select(User.id).where(User.id.in_(by_user.keys())))
+            known_users = set(result.scalars())
+            for unknown in set(by_user) - known_users:
+                summary["invalid"] += len(by_user.pop(unknown))
+
+        for owner_id, operations in by_user.items():
+            for attempt in range(IMPORT_CONFLICT_RETRIES + 1):
+                try:
+                    results = await apply_operations(db, owner_id, operations)
+                    break
+                except CollectionConflict as e:
+                    logger.warning(f"Import batch conflict (attempt {attempt + 1}): {e}")
+            else:
+                summary["conflict"] += len(operations)
+                continue
+            for item in results:
+                summary[item["status"]] = summary.get(item["status"], 0) + 1
+
+
+async def import_ndjson(chunks: AsyncIterator[bytes], user_id: Optional[int] = None) -> Dict[str, int]:
+    """Import NDJSON collection rows from a byte stream
+
+    Lines are parsed as they arrive and applied in transactions of
+    IMPORT_BATCH_SIZE records, so at most one batch is held in memory.
+    Records need pokemon_name and pokemon_id (pokemon_data is optional);
+    with user_id=None (admin restore) each record must also carry user_id.
+    Cap and duplicate rules are the same as for POST /collection/bulk.
+
+    A batch whose transaction conflicts with a concurrent writer is
+    retried; if it keeps conflicting its records are counted as "conflict"
+    and the import continues.
+
+    Returns:
+        Counts per outcome (added, duplicate, collection_full, invalid, conflict)
+    """
+    summary: Dict[str, int] = {
+        "lines": 0, "added": 0, "duplicate": 0, "collection_full": 0, "invalid": 0, "conflict": 0
+    }
+    batch: List[dict] = []
+
+    async for line in iter_lines(chunks):
+        if line is not None and not line.strip():
+            continue
+        summary["lines"] += 1
+        try:
+            if line is None:
+                raise ValueError("line too long")
+            record = json.loads(line)
+            op = CollectionBulkOperation(
+                op="add",
+                pokemon_name=record["pokemon_name"],
+                pokemon_id=record["pokemon_id"],
+                pokemon_data=record.get("pokemon_data"),
+            )
+            owner_id = user_id if user_id is not None else int(record["user_id"])
+        except (ValueError, KeyError, TypeError, ValidationError):
+            summary["invalid"] += 1
+            continue
+
+        batch.append({"user_id": owner_id, "op": op})
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _apply_batch(batch, user_id, summary)
+            batch = []
+
+    if batch:
+        await _apply_batch(batch, user_id, summary)
+
+    logger.info(f"Collection import finished: {summary}")
+    return summary
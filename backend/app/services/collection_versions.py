@@ -0,0 +1,69 @@
+from typing import Tuple
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import insert_ignore
+from app.models.collection import Collection
+from app.models.collection_version import CollectionVersion
+
+
+async def bump_version(db: AsyncSession, user_id: int, count_delta: int) -> None:
+    """Advance a user's collection version in the current transaction
+
+    Call after the collection rows were changed and before committing, so
+    the version and item count move together with the rows they describe.
+    """
+    async def advance() -> bool:
+        result = await db.execute(
+            update(CollectionVersion)
+            .where(CollectionVersion.user_id == user_id)
+            .values(
+                version=CollectionVersion.version + 1,
+                item_count=CollectionVersion.item_count + count_delta
+            )
+        )
+        return bool(result.rowcount)
+
+    if await advance():
+        return
+
+    # First mutation for this user: seed the count from the rows themselves
+    count_result = await db.execute(
+        select(func.count(Collection.id)).where(Collection.user_id == user_id)
+    )
+    result = await db.execute(insert_ignore(db, CollectionVersion, {
+        "user_id": user_id,
+        "version": 1,
+        "item_count": count_result.scalar(),
+    }))
+    if not result.rowcount:
+        # A concurrent first mutation seeded the row; advance it instead
+        await advance()
+
+
+async def bump_versions_for_pokemon(db: AsyncSession, pokemon_id: int) -> None:
+    """Advance the version of every collection holding a Pokémon whose shared data changed
+
+    Collection ETags derive from the version alone, so without this clients
+    would keep getting 304s for the old data. Item counts are unchanged.
+    """
+    await db.execute(
+        update(CollectionVersion)
+        .where(CollectionVersion.user_id.in_(
+            select(Collection.user_id).where(Collection.pokemon_id == pokemon_id)
+        ))
+        .values(version=CollectionVersion.version + 1)
+    )
+
+
+async def get_version(db: AsyncSession, user_id: int) -> Tuple[int, int]:
+    """Return (version, item_count); users who never changed their collection are at (0, 0)"""
+    result = await db.execute(
+        select(CollectionVersion.version, CollectionVersion.item_count)
+        .where(CollectionVersion.user_id == user_id)
+    )
+    row = result.one_or_none()
+    return (row.version, row.item_count) if row else (0, 0)
+
+
+def collection_etag(user_id: int, version: int) -> str:
+    return f'W/"collection-{user_id}-{version}"'
@@ -1,28 +1,42 @@
-from google import genai
-from google.genai import types
-from PIL import Image
-import io
+import asyncio
+import importlib
 from typing import Optional
 from app.config import settings
 
-# Configure Gemini API with the new client
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
-
 
 class GeminiService:
     """Service for Pokémon identification using Gemini Vision API"""
     
     def __init__(self):
-        self.client = client
+        # google.genai takes most of the app's import time, so the client is
+        # created on first use (or by warm()) rather than at import
+        self._client = None
         # Use Gemini 2.5 Flash for image analysis
         self.model_id = 'gemini-2.5-flash'
+        # Bounds concurrent model requests from this process (e.g. several
+        # regions of one photo identified in parallel)
+        self._semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+    
+    @property
+    def client(self):
+        """Gemini API client, created on first access"""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        return self._client
     
-    async def identify_pokemon(self, image_bytes: bytes) -> Optional[str]:
+    def warm(self) -> None:
+        """Create the client and load the request types ahead of the first scan"""
+        importlib.import_module("google.genai.types")
+        self.client
+    
+    async def identify_pokemon(self, image_bytes: bytes, mime_type: str = "image/jpeg") -> Optional[str]:
         """
         Identify Pokémon from image using Gemini Vision
         
         Args:
             image_bytes: Image file bytes
+            mime_type: MIME type of image_bytes
             
         Returns:
             Pokemon name or None if not identified
@@ -34,23 +48,26 @@ class GeminiService:
         Examples of valid responses: 'pikachu', 'charizard', 'mewtwo', 'unknown'
         """
         
+        from google.genai import types
+        
         try:
-            # Generate response using the new API
-            response = self.client.models.generate_content(
-                model=self.model_id,
-                contents=[
-                    types.Content(
-                        role="user",
-                        parts=[
-                            types.Part.from_text(text=prompt),
-                            types.Part.from_bytes(
-                                data=image_bytes,
-                                mime_type="image/jpeg"
-                            )
-                        ]
-                    )
-                ]
-            )
+            # Generate response using the async API so the event loop is not blocked
+            async with self._semaphore:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_id,
+                    contents=[
+                        types.Content(
+                            role="user",
+                            parts=[
+                                types.Part.from_text(text=prompt),
+                                types.Part.from_bytes(
+                                    data=image_bytes,
+                                    mime_type=mime_type
+                                )
+                            ]
+                        )
+                    ]
+                )
             
             # Extract and clean the response
             pokemon_name = response.text.strip().lower()
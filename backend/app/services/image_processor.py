@@ -1,12 +1,26 @@
-import cv2
-import numpy as np
-from PIL import Image
-import io
-from typing import Optional, Tuple
+from __future__ import annotations
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# cv2 and numpy are imported inside the methods so that importing the API
+# does not load OpenCV; call ImageProcessor.warm() to load them ahead of use
+
 
 class ImageProcessor:
     """Service for image preprocessing and enhancement using OpenCV"""
     
+    @staticmethod
+    def warm() -> None:
+        """Import OpenCV and run a tiny pipeline so first scans skip the setup cost"""
+        import cv2
+        import numpy as np
+        
+        img = np.zeros((8, 8, 3), np.uint8)
+        ImageProcessor._enhance_image(img)
+        cv2.imencode('.jpg', img)
+    
     @staticmethod
     def preprocess_image(image_bytes: bytes) -> bytes:
         """
@@ -22,30 +36,104 @@ class ImageProcessor:
             Processed image bytes
         """
         try:
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            img = ImageProcessor.decode_image(image_bytes)
             
             if img is None:
                 raise ValueError("Failed to decode image")
             
-            # Resize to standard size (keeping aspect ratio)
-            img = ImageProcessor._resize_image(img, max_size=800)
-            
-            # Enhance image quality
-            img = ImageProcessor._enhance_image(img)
-            
-            # Convert back to bytes
-            _, buffer = cv2.imencode('.jpg', img)
-            return buffer.tobytes()
-            
+            return ImageProcessor.preprocess_decoded(img)
+        
         except Exception as e:
             print(f"Error preprocessing image: {e}")
             return image_bytes  # Return original if processing fails
     
+    @staticmethod
+    def decode_image(image_bytes: bytes) -> Optional[np.ndarray]:
+        """Decode image bytes to a BGR array, or None if they are not an image"""
+        import cv2
+        import numpy as np
+        
+        if not image_bytes:
+            return None
+        try:
+            return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        except cv2.error as e:
+            print(f"Error decoding image: {e}")
+            return None
+    
+    @staticmethod
+    def preprocess_decoded(img: np.ndarray) -> bytes:
+        """Resize, enhance and JPEG-encode an already decoded image
+        
+        Raises:
+            ValueError: if encoding fails
+        """
+        import cv2
+        
+        # Resize to standard size (keeping aspect ratio)
+        img = ImageProcessor._resize_image(img, max_size=800)
+        
+        # Enhance image quality
+        img = ImageProcessor._enhance_image(img)
+        
+        # Convert back to bytes
+        ok, buffer = cv2.imencode('.jpg', img)
+        if not ok:
+            raise ValueError("Failed to encode image")
+        return buffer.tobytes()
+    
+    @staticmethod
+    def thumbnail(img: np.ndarray, max_size: int = 320, quality: int = 80) -> bytes:
+        """Small, lightly processed JPEG for a first, cheap recognition attempt
+        
+        Only resized and contrast-enhanced (no denoising), so it is much
+        faster to build and upload than preprocess_decoded's output.
+        
+        Raises:
+            ValueError: if encoding fails
+        """
+        import cv2
+        
+        img = ImageProcessor._resize_image(img, max_size=max_size)
+        img = ImageProcessor._enhance_image(img, denoise=False)
+        ok, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("Failed to encode image")
+        return buffer.tobytes()
+    
+    @staticmethod
+    def frame_hash(image_bytes: bytes) -> Optional[int]:
+        """64-bit difference hash of an image, for cheap scene-change detection
+        
+        Frames of the same scene differ in only a few bits (compare with
+        hash_distance); decoding is done at reduced size, so this costs a
+        fraction of a full decode. None if the bytes are not an image.
+        """
+        import cv2
+        import numpy as np
+        
+        if not image_bytes:
+            return None
+        try:
+            gray = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        except cv2.error:
+            return None
+        if gray is None:
+            return None
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    
+    @staticmethod
+    def hash_distance(a: int, b: int) -> int:
+        """Number of differing bits between two frame hashes"""
+        return bin(a ^ b).count("1")
+    
     @staticmethod
     def _resize_image(img: np.ndarray, max_size: int = 800) -> np.ndarray:
         """Resize image while maintaining aspect ratio"""
+        import cv2
+        
         height, width = img.shape[:2]
         
         if max(height, width) <= max_size:
@@ -61,8 +149,10 @@ class ImageProcessor:
         return cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
     
     @staticmethod
-    def _enhance_image(img: np.ndarray) -> np.ndarray:
+    def _enhance_image(img: np.ndarray, denoise: bool = True) -> np.ndarray:
         """Enhance image quality for better detection"""
+        import cv2
+        
         # Convert to LAB color space
         lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
         l, a, b = cv2.split(lab)
@@ -76,7 +166,8 @@ class ImageProcessor:
         enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
         
         # Denoise
-        enhanced = cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
+        if denoise:
+            enhanced = cv2.fastNlMeansDenoisingColored(enhanced, None, 10, 10, 7, 21)
         
         return enhanced
     
@@ -86,6 +177,9 @@ class ImageProcessor:
         Detect the main object region in the image
         Returns bounding box (x, y, width, height) or None
         """
+        import cv2
+        import numpy as np
+        
         try:
             nparr = np.frombuffer(image_bytes, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
@@ -115,9 +209,78 @@ class ImageProcessor:
             print(f"Error detecting object region: {e}")
             return None
     
+    @staticmethod
+    def detect_object_regions(
+        img: np.ndarray,
+        max_regions: int = 6,
+        min_area_ratio: float = 0.02,
+        overlap_threshold: float = 0.3,
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Detect up to max_regions separate objects in a decoded image
+        
+        Contours are filtered by size (at least min_area_ratio of the frame,
+        not the whole frame) and aspect ratio, then non-max suppression drops
+        boxes that overlap a larger one by more than overlap_threshold (IoU)
+        or lie mostly inside it.
+        
+        Returns:
+            Bounding boxes (x, y, width, height), largest first
+        """
+        import cv2
+        
+        height, width = img.shape[:2]
+        frame_area = height * width
+        
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(gray, 50, 150)
+        # Close small gaps so each card/figure becomes one contour
+        edges = cv2.dilate(edges, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5)), iterations=2)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        candidates = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            area = w * h
+            if area < min_area_ratio * frame_area or area > 0.95 * frame_area:
+                continue
+            if not 0.2 <= w / h <= 5:
+                continue
+            candidates.append((area, (x, y, w, h)))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        
+        kept: List[Tuple[int, int, int, int]] = []
+        for area, box in candidates:
+            if len(kept) >= max_regions:
+                break
+            suppressed = False
+            for other in kept:
+                ix = max(0, min(box[0] + box[2], other[0] + other[2]) - max(box[0], other[0]))
+                iy = max(0, min(box[1] + box[3], other[1] + other[3]) - max(box[1], other[1]))
+                intersection = ix * iy
+                union = area + other[2] * other[3] - intersection
+                if intersection / union > overlap_threshold or intersection > 0.8 * area:
+                    suppressed = True
+                    break
+            if not suppressed:
+                kept.append(box)
+        return kept
+    
+    @staticmethod
+    def crop_region(img: np.ndarray, box: Tuple[int, int, int, int], padding: int = 20) -> np.ndarray:
+        """Crop a bounding box (x, y, width, height) with padding, clipped to the image"""
+        x, y, w, h = box
+        x0, y0 = max(0, x - padding), max(0, y - padding)
+        x1, y1 = min(img.shape[1], x + w + padding), min(img.shape[0], y + h + padding)
+        return img[y0:y1, x0:x1]
+    
     @staticmethod
     def crop_to_object(image_bytes: bytes) -> bytes:
         """Crop image to focus on the main object"""
+        import cv2
+        import numpy as np
+        
         try:
             bbox = ImageProcessor.detect_object_region(image_bytes)
             
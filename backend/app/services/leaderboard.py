@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.collection import Collection
+from app.models.collection_version import CollectionVersion
+from app.models.pokemon_count import PokemonCount
+
+logger = logging.getLogger(__name__)
+
+
+def _increment_statement(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """Upsert that adds 1 to collector_count per row, creating missing rows"""
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(PokemonCount).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[PokemonCount.pokemon_name],
+            set_={"collector_count": PokemonCount.collector_count + stmt.excluded.collector_count}
+        )
+    from sqlalchemy.dialects.mysql import insert as dialect_insert
+    stmt = dialect_insert(PokemonCount).values(rows)
+    return stmt.on_duplicate_key_update(
+        collector_count=PokemonCount.collector_count + stmt.inserted.collector_count
+    )
+
+
+class LeaderboardService:
+    """Global "most collected" stats served from memory
+
+    Per-Pokémon collector counts are kept in pokemon_counts and updated in
+    the same transaction as every collection add/remove. A background task
+    copies the top entries and the collection-size distribution into memory
+    every LEADERBOARD_REFRESH_SECONDS, so requests never touch the database,
+    and periodically rebuilds the counters from the collections table to
+    correct drift (e.g. rows removed by user deletion cascades).
+    """
+
+    def __init__(
+        self,
+        size: int = settings.LEADERBOARD_SIZE,
+        refresh_seconds: float = settings.LEADERBOARD_REFRESH_SECONDS,
+        reconcile_seconds: float = settings.LEADERBOARD_RECONCILE_SECONDS,
+    ):
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self._top: List[Dict[str, Any]] = []
+        self._sizes: Dict[int, int] = {}
+        self._updated_at: Optional[datetime] = None
+        self._last_reconcile = 0.0
+
+    # Incremental maintenance (called inside collection write transactions)
+
+    async def record_added(self, db: AsyncSession, pokemon: Iterable[Tuple[str, int]]) -> None:
+        rows = [{"pokemon_name": name, "pokemon_id": pokemon_id, "collector_count": 1} for name, pokemon_id in pokemon]
+        if rows:
+            await db.execute(_increment_statement(db, rows))
+
+    async def record_removed(self, db: AsyncSession, user_id: int, collection_ids: Iterable[int]) -> None:
+        """Decrement counters for collection rows that are about to be deleted"""
+        names = (
+            select(Collection.pokemon_name)
+            .where(Collection.user_id == user_id, Collection.id.in_(list(collection_ids)))
+        )
+        await db.execute(
+            update(PokemonCount)
+            .where(PokemonCount.pokemon_name.in_(names))
+            .values(collector_count=PokemonCount.collector_count - 1)
+        )
+
+    # In-memory snapshot
+
+    async def refresh(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(PokemonCount.pokemon_name, PokemonCount.pokemon_id, PokemonCount.collector_count)
+            .where(PokemonCount.collector_count > 0)
+            .order_by(PokemonCount.collector_count.desc(), PokemonCount.pokemon_name)
+            .limit(self.size)
+        )
+        top = [
+            {"rank": rank, "pokemon_name": row.pokemon_name, "pokemon_id": row.pokemon_id, "collectors": row.collector_count}
+            for rank, row in enumerate(result.all(), start=1)
+        ]
+
+        result = await db.execute(
+            select(CollectionVersion.item_count, func.count())
+            .where(CollectionVersion.item_count > 0)
+            .group_by(CollectionVersion.item_count)
+        )
+        sizes = {item_count: users for item_count, users in result.all()}
+
+        self._top, self._sizes, self._updated_at = top, sizes, datetime.utcnow()
+
+    async def reconcile(self, db: AsyncSession) -> None:
+        """Rebuild all counters from the collections table"""
+        await db.execute(delete(PokemonCount))
+        await db.execute(text(
+            "INSERT INTO pokemon_counts (pokemon_name, pokemon_id, collector_count) "
+            "SELECT pokemon_name, MIN(pokemon_id), COUNT(*) FROM collections GROUP BY pokemon_name"
+        ))
+        await db.commit()
+        self._last_reconcile = time.monotonic()
+
+    async def run(self) -> None:
+        """Background loop: reconcile on start and periodically, refresh the snapshot"""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not self._last_reconcile or time.monotonic() - self._last_reconcile >= self.reconcile_seconds:
+                        await self.reconcile(db)
+                    await self.refresh(db)
+            except Exception as e:
+                logger.warning(f"Leaderboard refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        return self._top[:limit]
+
+    def snapshot(self, limit: int) -> Dict[str, Any]:
+        return {
+            "top": self.top(limit),
+            "collection_sizes": self._sizes,
+            "total_collectors": sum(self._sizes.values()),
+            "updated_at": self._updated_at,
+        }
+
+
+# Singleton instance
+leaderboard_service = LeaderboardService()
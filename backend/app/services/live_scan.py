@@ -0,0 +1,145 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from app.config import settings
+from app.core.admission import scan_admission
+from app.core.rate_limit import RateLimiter
+from app.core.responses import dump_json
+from app.services.image_processor import image_processor
+from app.services.scan_pipeline import scan_image
+
+# Recognitions count against the same per-user budget as POST /pokemon/scan
+scan_rate_limiter = RateLimiter(settings.RATE_LIMIT_SCAN, scope="scan")
+
+
+class LiveScanSession:
+    """Continuous scanning of a camera frame stream over one WebSocket
+
+    Frames arrive as binary messages. Only the newest frame is kept: frames
+    received while a recognition is in flight replace each other, so a slow
+    model never builds a backlog. Before recognizing, a frame's difference
+    hash is compared with the last recognized frame; when the scene has not
+    changed (distance <= ``hash_threshold`` bits) the frame is skipped.
+
+    Messages sent to the client (JSON text):
+        {"type": "result", "frame": n, "pokemon": {...}, "stats": {...}}
+        {"type": "not_found", "frame": n, "detail": "...", "stats": {...}}
+        {"type": "error", "frame": n, "status_code": 429, "detail": "...", "retry_after": 6}
+
+    A text message {"type": "reset"} forgets the last scene, so the next
+    frame is recognized even if it looks the same.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        hash_threshold: int = settings.SCAN_LIVE_HASH_THRESHOLD,
+        max_frame_bytes: int = settings.SCAN_LIVE_MAX_FRAME_BYTES,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.hash_threshold = hash_threshold
+        self.max_frame_bytes = max_frame_bytes
+        self.received = 0
+        self.dropped = 0  # Replaced by a newer frame before being looked at
+        self.unchanged = 0  # Same scene as the last recognized frame
+        self.recognized = 0
+        self._latest: Optional[Tuple[int, bytes]] = None
+        self._frame_ready = asyncio.Event()
+        self._reference_hash: Optional[int] = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "unchanged": self.unchanged,
+            "recognized": self.recognized,
+        }
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        await self.websocket.send_text(dump_json(message).decode())
+
+    async def _receive_frames(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is None:
+                try:
+                    control = json.loads(message.get("text") or "")
+                except ValueError:
+                    continue
+                if isinstance(control, dict) and control.get("type") == "reset":
+                    self._reference_hash = None
+                continue
+
+            self.received += 1
+            if len(data) > self.max_frame_bytes:
+                self.dropped += 1
+                continue
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = (self.received, data)
+            self._frame_ready.set()
+
+    async def _recognize(self, frame: int, data: bytes, frame_hash: int) -> None:
+        try:
+            await scan_rate_limiter.check(f"user:{self.user_id}", Response())
+            async with scan_admission.slot():
+                _, pokemon_data = await scan_image(self.user_id, data)
+        except HTTPException as e:
+            if e.status_code in (status.HTTP_429_TOO_MANY_REQUESTS, status.HTTP_503_SERVICE_UNAVAILABLE):
+                # Not an answer about this scene; the next frame is tried again
+                retry_after = int((e.headers or {}).get("Retry-After", 1))
+                await self._send({
+                    "type": "error", "frame": frame, "status_code": e.status_code,
+                    "detail": e.detail, "retry_after": retry_after,
+                })
+                return
+            self._reference_hash = frame_hash
+            self.recognized += 1
+            await self._send({"type": "not_found", "frame": frame, "detail": e.detail, "stats": self.stats()})
+            return
+
+        self._reference_hash = frame_hash
+        self.recognized += 1
+        await self._send({"type": "result", "frame": frame, "pokemon": pokemon_data, "stats": self.stats()})
+
+    async def _process_frames(self) -> None:
+        while True:
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            frame, data = self._latest
+            self._latest = None
+
+            frame_hash = await asyncio.to_thread(image_processor.frame_hash, data)
+            if frame_hash is None:
+                await self._send({
+                    "type": "error", "frame": frame,
+                    "status_code": status.HTTP_400_BAD_REQUEST, "detail": "Frame is not an image",
+                })
+                continue
+            if (
+                self._reference_hash is not None
+                and image_processor.hash_distance(frame_hash, self._reference_hash) <= self.hash_threshold
+            ):
+                self.unchanged += 1
+                continue
+
+            await self._recognize(frame, data, frame_hash)
+
+    async def run(self) -> None:
+        """Serve the session until the client disconnects"""
+        receiver = asyncio.create_task(self._receive_frames())
+        processor = asyncio.create_task(self._process_frames())
+        done, pending = await asyncio.wait({receiver, processor}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
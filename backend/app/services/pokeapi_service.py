@@ -1,20 +1,28 @@
-import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
 from functools import lru_cache
+import asyncio
 import time
+from app.core.compression import LIVE_BROTLI_QUALITY, LIVE_GZIP_LEVEL, Precompressed, compress_variants
+from app.core.responses import dump_json
+from app.services.pokedex_snapshot import pokedex_snapshot
+from app.services.pokemon_record import PokemonRecord
 
-# Import python-certifi-win32 to merge Windows Certificate Store with certifi
-# This allows Python to trust certificates that Windows trusts (e.g., corporate proxies)
-try:
-    import certifi_win32
-    # Patch certifi to include Windows Certificate Store (API varies by version)
-    if hasattr(certifi_win32, "install"):
-        certifi_win32.install()
-    elif hasattr(certifi_win32, "wincerts") and hasattr(certifi_win32.wincerts, "install"):
-        certifi_win32.wincerts.install()
-except Exception:
-    # If not installed or API changed, fall back to default certifi
-    pass
+
+def _install_windows_certificates():
+    """Import python-certifi-win32 to merge Windows Certificate Store with certifi
+    
+    This allows Python to trust certificates that Windows trusts (e.g., corporate proxies)
+    """
+    try:
+        import certifi_win32
+        # Patch certifi to include Windows Certificate Store (API varies by version)
+        if hasattr(certifi_win32, "install"):
+            certifi_win32.install()
+        elif hasattr(certifi_win32, "wincerts") and hasattr(certifi_win32.wincerts, "install"):
+            certifi_win32.wincerts.install()
+    except Exception:
+        # If not installed or API changed, fall back to default certifi
+        pass
 
 
 class PokeAPIService:
@@ -22,47 +30,110 @@ class PokeAPIService:
     
     BASE_URL = "https://pokeapi.co/api/v2"
     CACHE_DURATION = 86400  # 24 hours
+    CACHE_MAX_ENTRIES = 500
     
     def __init__(self):
-        # Use proper headers to avoid 403 errors
-        headers = {
-            'User-Agent': 'PokeTab/1.0 (Python/httpx)',
-            'Accept-Encoding': 'gzip, deflate',  # Enable compression
-        }
-        # Disable SSL verification for PokeAPI (public API, safe for dev)
-        # On Windows, SSL certificate verification can fail even with certifi-win32
-        self.client = httpx.AsyncClient(
-            timeout=10.0,  # Reduce timeout from 30s to 10s
-            follow_redirects=True,
-            headers=headers,
-            verify=False,  # Disable SSL verification for PokeAPI (public API)
-            limits=httpx.Limits(max_keepalive_connections=5),  # Connection pooling
-        )
-        # In-memory cache: {pokemon_name: (data, timestamp)}
+        # HTTP client is created on first use so importing the app does not load httpx
+        self._client = None
+        # In-memory cache: {pokemon_name: (PokemonRecord, Precompressed, timestamp)}
         self._cache: Dict[str, tuple] = {}
     
+    @property
+    def client(self):
+        """Shared httpx client, created on first access"""
+        if self._client is None:
+            import httpx
+            _install_windows_certificates()
+            # Use proper headers to avoid 403 errors
+            headers = {
+                'User-Agent': 'PokeTab/1.0 (Python/httpx)',
+                'Accept-Encoding': 'gzip, deflate',  # Enable compression
+            }
+            # Disable SSL verification for PokeAPI (public API, safe for dev)
+            # On Windows, SSL certificate verification can fail even with certifi-win32
+            self._client = httpx.AsyncClient(
+                timeout=10.0,  # Reduce timeout from 30s to 10s
+                follow_redirects=True,
+                headers=headers,
+                verify=False,  # Disable SSL verification for PokeAPI (public API)
+                limits=httpx.Limits(max_keepalive_connections=5),  # Connection pooling
+            )
+        return self._client
+    
     def _get_from_cache(self, key: str) -> Optional[Dict[str, Any]]:
         """Get from in-memory cache if not expired"""
         if key in self._cache:
-            data, timestamp = self._cache[key]
+            data, _, timestamp = self._cache[key]
             # Check if cache expired (24 hours)
             if time.time() - timestamp < self.CACHE_DURATION:
                 print(f"[CACHE HIT] {key}")
-                return data
+                return data.to_dict() if isinstance(data, PokemonRecord) else data
             else:
                 # Remove expired entry
                 del self._cache[key]
         return None
     
-    def _set_cache(self, key: str, data: Dict[str, Any]):
-        """Store in in-memory cache"""
-        self._cache[key] = (data, time.time())
-        # Limit cache size to 500 entries
-        if len(self._cache) > 500:
+    def is_cached(self, pokemon_name: str) -> bool:
+        """Whether a lookup for this name would be served from the cache"""
+        clean_name = pokemon_name.strip().lower().replace(' ', '-')
+        entry = self._cache.get(clean_name)
+        if entry is not None and time.time() - entry[2] < self.CACHE_DURATION:
+            return True
+        return clean_name in pokedex_snapshot
+    
+    def get_compressed(self, pokemon_name: str) -> Optional[Precompressed]:
+        """gzip/brotli variants of the JSON get_pokemon_data returns for this name
+        
+        Built once when the entry was cached (or snapshotted), so responses
+        are not compressed per request. None when the name is in neither.
+        """
+        clean_name = pokemon_name.strip().lower().replace(' ', '-')
+        entry = self._cache.get(clean_name)
+        if entry is not None and time.time() - entry[2] < self.CACHE_DURATION:
+            return entry[1]
+        return pokedex_snapshot.get_compressed(clean_name)
+    
+    @staticmethod
+    def _compress_all(entries: List[Dict[str, Any]]) -> List[Precompressed]:
+        """Response variants for cache entries; blocking, run in a worker thread"""
+        return [
+            compress_variants(dump_json(data), gzip_level=LIVE_GZIP_LEVEL, brotli_quality=LIVE_BROTLI_QUALITY)
+            for data in entries
+        ]
+    
+    async def _set_cache(self, key: str, data: Dict[str, Any]):
+        """Store in in-memory cache, packed into a compact PokemonRecord
+        
+        The compressed response variants are built here, once per entry,
+        in a worker thread so the event loop keeps serving requests.
+        """
+        (variants,) = await asyncio.to_thread(self._compress_all, [data])
+        self._store(key, data, variants)
+    
+    def _store(self, key: str, data: Dict[str, Any], variants: Precompressed):
+        try:
+            entry = PokemonRecord.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            entry = data  # Unexpected shape; keep the dict as-is
+        self._cache[key] = (entry, variants, time.time())
+        # Limit cache size to CACHE_MAX_ENTRIES entries
+        if len(self._cache) > self.CACHE_MAX_ENTRIES:
             # Remove oldest entry
-            oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
+            oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][2])
             del self._cache[oldest_key]
     
+    async def prime_cache(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Seed the cache with already verified data, e.g. from the pokemon table
+        
+        All entries are compressed in one worker thread.
+        """
+        variants = await asyncio.to_thread(self._compress_all, list(entries.values()))
+        for (pokemon_name, data), entry_variants in zip(entries.items(), variants):
+            self._store(pokemon_name.strip().lower().replace(' ', '-'), data, entry_variants)
+    
+    def cache_size(self) -> int:
+        return len(self._cache)
+    
     async def get_pokemon_data(self, pokemon_name: str) -> Optional[Dict[str, Any]]:
         """
         Fetch Pokémon data from PokeAPI with caching
@@ -82,6 +153,13 @@ class PokeAPIService:
             if cached_data:
                 return cached_data
             
+            # Then the memory-mapped snapshot shared by all workers; entries
+            # are decoded per request and not copied into this process' cache
+            snapshot_data = pokedex_snapshot.get(clean_name)
+            if snapshot_data is not None:
+                print(f"[SNAPSHOT HIT] {clean_name}")
+                return snapshot_data
+            
             # Fetch from PokeAPI
             url = f"{self.BASE_URL}/pokemon/{clean_name}"
             print(f"[API CALL] Fetching from: {url}")
@@ -138,7 +216,7 @@ class PokeAPIService:
                 }
                 
                 # Cache the result
-                self._set_cache(clean_name, pokemon_data)
+                await self._set_cache(clean_name, pokemon_data)
                 print(f"[SUCCESS] Fetched and cached {pokemon_data.get('name')}")
                 return pokemon_data
             else:
@@ -151,9 +229,31 @@ class PokeAPIService:
             traceback.print_exc()
             return None
     
+    async def get_many(self, pokemon_names: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch several Pokémon at once
+        
+        Names are deduplicated after normalizing, so each Pokémon is looked
+        up once; cache and snapshot hits return immediately and only the
+        misses are fetched from PokeAPI, concurrently.
+        
+        Args:
+            pokemon_names: Names of the Pokémon
+            
+        Returns:
+            Data (or None if not found) keyed by each name as given
+        """
+        clean_names = {name: name.strip().lower().replace(' ', '-') for name in pokemon_names}
+        unique_names = list(dict.fromkeys(clean_names.values()))
+        lookups = await asyncio.gather(*(self.get_pokemon_data(name) for name in unique_names))
+        found = dict(zip(unique_names, lookups))
+        return {name: found[clean_name] for name, clean_name in clean_names.items()}
+    
     async def close(self):
         """Close the HTTP client"""
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
 # Singleton instance
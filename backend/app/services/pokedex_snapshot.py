@@ -0,0 +1,203 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from app.config import settings
+from app.core.compression import Precompressed, compress_variants
+
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   header  magic, format version, record count, build time (unix seconds)
+#   index   one fixed-size entry per Pokémon, sorted by name:
+#           null-padded name, record offset, JSON / gzip / brotli lengths, pokemon id
+#   records compact JSON followed by its gzip and brotli variants (brotli
+#           length 0 when brotli was not installed), one per Pokémon, in index order
+HEADER = struct.Struct("<4sIIQ")
+INDEX_ENTRY = struct.Struct("<48sQIIIi")
+MAGIC = b"PTDX"
+FORMAT_VERSION = 2
+NAME_BYTES = 48
+
+
+def snapshot_key(pokemon_name: str) -> str:
+    """Normalize a name the same way the PokeAPI service does"""
+    return pokemon_name.strip().lower().replace(' ', '-')
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """Write a snapshot file and atomically replace path with it
+
+    Returns:
+        Number of records written
+    """
+    records = {}
+    for name, data in entries:
+        key = snapshot_key(name).encode()
+        if len(key) > NAME_BYTES:
+            logger.warning(f"Skipping {name!r}: name longer than {NAME_BYTES} bytes")
+            continue
+        records[key] = data
+    names = sorted(records)
+
+    blobs = [json.dumps(records[name], separators=(",", ":")).encode() for name in names]
+    variants = [compress_variants(blob) for blob in blobs]
+    offset = HEADER.size + INDEX_ENTRY.size * len(names)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(names), int(time.time())))
+        for name, blob, variant in zip(names, blobs, variants):
+            br_length = len(variant.br) if variant.br is not None else 0
+            f.write(INDEX_ENTRY.pack(
+                name, offset, len(blob), len(variant.gzip), br_length, records[name].get("id") or 0
+            ))
+            offset += len(blob) + len(variant.gzip) + br_length
+        for blob, variant in zip(blobs, variants):
+            f.write(blob)
+            f.write(variant.gzip)
+            f.write(variant.br or b"")
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers keep their current mapping until they notice the new file
+    os.replace(tmp_path, path)
+    return len(names)
+
+
+class PokedexSnapshot:
+    """Read-only Pokédex shared by all worker processes through the page cache
+
+    The snapshot file is memory-mapped, so N workers share one copy of the
+    data instead of each holding its own dictionaries. Lookups binary-search
+    the fixed-size index inside the mapping and decode only the requested
+    record; each record's gzip and brotli variants are stored next to it
+    and served as-is. The file is re-checked at most every ``check_interval`` seconds
+    and remapped when it was replaced (new inode, size or mtime). Build new
+    snapshots with write_snapshot, which swaps the file in atomically; never
+    rewrite the file in place while workers have it mapped.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.POKEDEX_SNAPSHOT_PATH,
+        check_interval: float = settings.POKEDEX_SNAPSHOT_CHECK_SECONDS,
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.built_at: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._identity = None
+        self._next_check = 0.0
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if not self.path or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._mm is not None:
+                logger.info(f"Pokédex snapshot {self.path} removed")
+                self._close()
+            return
+        identity = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if identity != self._identity:
+            self._open(identity)
+
+    def _open(self, identity) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count, built_at = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                mm.close()
+                raise ValueError(f"unsupported format {magic!r} v{version}, rebuild it with build_pokedex_snapshot.py")
+            size = len(mm)
+            if size < HEADER.size + count * INDEX_ENTRY.size:
+                mm.close()
+                raise ValueError(f"truncated: index of {count} entries does not fit in {size} bytes")
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Could not load Pokédex snapshot {self.path}: {e}")
+            self._identity = identity  # Do not retry until the file changes
+            return
+
+        self._close()
+        self._mm, self._count, self.built_at, self._identity = mm, count, built_at, identity
+        logger.info(f"Pokédex snapshot loaded: {count} Pokémon from {self.path}")
+
+    def _close(self) -> None:
+        # Records are decoded into new objects, so nothing refers into the old mapping
+        if self._mm is not None:
+            self._mm.close()
+        self._mm, self._count, self.built_at, self._identity = None, 0, None, None
+
+    def _find(self, pokemon_name: str) -> Optional[Tuple[int, int, int, int]]:
+        self._maybe_reload()
+        if self._mm is None:
+            return None
+        key = snapshot_key(pokemon_name).encode()
+        if len(key) > NAME_BYTES:
+            return None
+        key = key.ljust(NAME_BYTES, b"\0")
+
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            try:
+                name, offset, length, gzip_length, br_length, _ = INDEX_ENTRY.unpack_from(
+                    self._mm, HEADER.size + mid * INDEX_ENTRY.size
+                )
+            except (struct.error, ValueError) as e:
+                logger.warning(f"Bad Pokédex snapshot index entry {mid} in {self.path}: {e}")
+                return None
+            if name == key:
+                if offset + length + gzip_length + br_length > len(self._mm):
+                    # Treated as missing, so the lookup falls back to PokeAPI
+                    logger.warning(f"Pokédex snapshot record for {pokemon_name!r} lies outside {self.path}")
+                    return None
+                return offset, length, gzip_length, br_length
+            if name < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, pokemon_name: str) -> Optional[Dict[str, Any]]:
+        """Decode one Pokémon from the snapshot, or None when it is not in it"""
+        location = self._find(pokemon_name)
+        if location is None:
+            return None
+        offset, length, _, _ = location
+        try:
+            return json.loads(self._mm[offset:offset + length])
+        except ValueError as e:
+            logger.warning(f"Bad Pokédex snapshot record for {pokemon_name!r}: {e}")
+            return None
+
+    def get_compressed(self, pokemon_name: str) -> Optional[Precompressed]:
+        """Stored gzip/brotli variants of one Pokémon's JSON, or None when it is not in the snapshot"""
+        location = self._find(pokemon_name)
+        if location is None:
+            return None
+        offset, length, gzip_length, br_length = location
+        start = offset + length
+        return Precompressed(
+            gzip=self._mm[start:start + gzip_length],
+            br=self._mm[start + gzip_length:start + gzip_length + br_length] if br_length else None,
+        )
+
+    def __contains__(self, pokemon_name: str) -> bool:
+        return self._find(pokemon_name) is not None
+
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return self._count
+
+
+# Singleton instance
+pokedex_snapshot = PokedexSnapshot()
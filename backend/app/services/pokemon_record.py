@@ -0,0 +1,203 @@
+import sys
+from typing import Any, Dict, Optional, Tuple, Union
+
+API_PREFIX = "https://pokeapi.co/api/v2/"
+SPRITE_PREFIX = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/"
+
+# PokeAPI always lists these six stats in this order, with ids 1..6
+STANDARD_STATS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+# A resource reference is the id when the URL follows the API pattern, else the URL itself
+ResourceRef = Union[int, str]
+
+_interned_paths: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Identical tuples (e.g. the sprite templates of most Pokémon, common type
+# and ability combinations) are stored once and shared between records; the
+# table stops growing at _MAX_SHARED_TUPLES, later tuples are kept unshared
+_shared_tuples: Dict[tuple, tuple] = {}
+_MAX_SHARED_TUPLES = 4096
+
+# Stands in for an empty dict leaf of the sprite tree, which is not hashable
+_EMPTY_NODE = ()
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _share(value: tuple) -> tuple:
+    shared = _shared_tuples.get(value)
+    if shared is not None:
+        return shared
+    if len(_shared_tuples) < _MAX_SHARED_TUPLES:
+        _shared_tuples[value] = value
+    return value
+
+
+def _resource_ref(url: Optional[str], kind: str) -> Optional[ResourceRef]:
+    """Reduce "https://pokeapi.co/api/v2/{kind}/{id}/" to its id"""
+    if url is None:
+        return None
+    prefix = f"{API_PREFIX}{kind}/"
+    if url.startswith(prefix) and url.endswith("/") and url[len(prefix):-1].isdigit():
+        return int(url[len(prefix):-1])
+    return url
+
+
+def _resource_url(ref: Optional[ResourceRef], kind: str) -> Optional[str]:
+    if isinstance(ref, int):
+        return f"{API_PREFIX}{kind}/{ref}/"
+    return ref
+
+
+def _pack_sprite(url: Optional[str], pokemon_id: int) -> Optional[str]:
+    """Turn a sprite URL into an interned template such as "other/home/shiny/{id}.png"
+
+    Templates are shared by every Pokémon; URLs that do not follow the
+    pattern are kept verbatim.
+    """
+    if url is None or not url.startswith(SPRITE_PREFIX):
+        return url
+    head, sep, filename = url[len(SPRITE_PREFIX):].rpartition("/")
+    stem, dot, ext = filename.partition(".")
+    if stem != str(pokemon_id) or not dot:
+        return url
+    return sys.intern(f"{head}{sep}{{id}}.{ext}")
+
+
+def _pack_leaf(value: Any, pokemon_id: int) -> Any:
+    if isinstance(value, str):
+        return _pack_sprite(value, pokemon_id)
+    return _EMPTY_NODE if value == {} else value
+
+
+def _unpack_sprite(packed: Optional[str], pokemon_id: int) -> Optional[str]:
+    if packed is None or "{id}" not in packed:
+        return packed
+    return SPRITE_PREFIX + packed.replace("{id}", str(pokemon_id))
+
+
+def _flatten(tree: Dict[str, Any], path: Tuple[str, ...] = ()):
+    for key, value in tree.items():
+        if isinstance(value, dict) and value:
+            yield from _flatten(value, path + (key,))
+        else:
+            full_path = path + (sys.intern(key),)
+            yield _interned_paths.setdefault(full_path, full_path), value
+
+
+class PokemonRecord:
+    """Compact cache entry for the data returned by PokeAPIService
+
+    Compared to the plain dict tree, names are interned, API URLs are
+    reduced to ids, sprite URLs to templates, and the six standard stats
+    are packed into 12 bytes (base stats, then efforts). Type, ability and
+    sprite tuples that are equal across Pokémon are shared. Convert back
+    with to_dict() where the data leaves the cache.
+    """
+
+    __slots__ = ("id", "name", "height", "weight", "types", "stats", "abilities", "sprites", "species")
+
+    def __init__(self, id, name, height, weight, types, stats, abilities, sprites, species):
+        self.id = id
+        self.name = name
+        self.height = height
+        self.weight = weight
+        self.types = types            # ((slot, type_name, type_ref), ...)
+        self.stats = stats            # bytes(12), or ((base_stat, effort, stat_name, stat_ref), ...)
+        self.abilities = abilities    # ((ability_name, ability_ref, is_hidden, slot), ...)
+        self.sprites = sprites        # ((path, packed_url), ...) including front_default/front_shiny
+        self.species = species        # species ref
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PokemonRecord":
+        """Pack a PokeAPIService payload
+
+        Raises:
+            KeyError, TypeError, ValueError: if data does not have that shape
+        """
+        pokemon_id = data["id"]
+        types = tuple(
+            (t["slot"], sys.intern(t["type"]["name"]), _resource_ref(t["type"]["url"], "type"))
+            for t in data["types"]
+        )
+
+        stats = data["stats"]
+        names = tuple(s["stat"]["name"] for s in stats)
+        refs = tuple(_resource_ref(s["stat"]["url"], "stat") for s in stats)
+        values = [s["base_stat"] for s in stats] + [s["effort"] for s in stats]
+        if names == STANDARD_STATS and refs == (1, 2, 3, 4, 5, 6) and all(0 <= v <= 255 for v in values):
+            packed_stats = bytes(values)
+        else:
+            packed_stats = tuple(
+                (s["base_stat"], s["effort"], sys.intern(s["stat"]["name"]), ref)
+                for s, ref in zip(stats, refs)
+            )
+
+        abilities = tuple(
+            (sys.intern(a["ability"]["name"]), _resource_ref(a["ability"]["url"], "ability"), a["is_hidden"], a["slot"])
+            for a in data["abilities"]
+        )
+        sprites = tuple(
+            (path, _pack_leaf(value, pokemon_id))
+            for path, value in _flatten(data["sprites"])
+        )
+
+        return cls(
+            pokemon_id,
+            _intern(data["name"]),
+            data["height"],
+            data["weight"],
+            _share(types),
+            packed_stats,
+            _share(abilities),
+            _share(sprites),
+            _resource_ref(data.get("species_url"), "pokemon-species"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rebuild the payload exactly as PokeAPIService produced it"""
+        if isinstance(self.stats, bytes):
+            half = len(STANDARD_STATS)
+            stats = [
+                {
+                    "base_stat": self.stats[i],
+                    "effort": self.stats[half + i],
+                    "stat": {"name": name, "url": _resource_url(i + 1, "stat")},
+                }
+                for i, name in enumerate(STANDARD_STATS)
+            ]
+        else:
+            stats = [
+                {"base_stat": base, "effort": effort, "stat": {"name": name, "url": _resource_url(ref, "stat")}}
+                for base, effort, name, ref in self.stats
+            ]
+
+        sprites: Dict[str, Any] = {}
+        for path, packed in self.sprites:
+            node = sprites
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            if isinstance(packed, str):
+                node[path[-1]] = _unpack_sprite(packed, self.id)
+            else:
+                node[path[-1]] = {} if packed == _EMPTY_NODE else packed
+
+        return {
+            "id": self.id,
+            "name": self.name,
+            "height": self.height,
+            "weight": self.weight,
+            "types": [
+                {"slot": slot, "type": {"name": name, "url": _resource_url(ref, "type")}}
+                for slot, name, ref in self.types
+            ],
+            "stats": stats,
+            "abilities": [
+                {"ability": {"name": name, "url": _resource_url(ref, "ability")}, "is_hidden": is_hidden, "slot": slot}
+                for name, ref, is_hidden, slot in self.abilities
+            ],
+            "sprites": sprites,
+            "species_url": _resource_url(self.species, "pokemon-species"),
+        }
@@ -0,0 +1,76 @@
+from typing import Optional, Dict, Any
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import insert_ignore
+from app.models.collection import Collection
+from app.models.pokemon import Pokemon, content_hash
+from app.services.pokeapi_service import pokeapi_service
+from app.services.collection_versions import bump_versions_for_pokemon
+
+
+class PokemonStore:
+    """Maintains the shared pokemon table that collection rows reference
+
+    Only data fetched from PokeAPI (through the service cache) whose id
+    matches the requested pokemon_id is shared. Client-supplied payloads
+    are never written here: callers keep them on the user's own collection
+    row until a verified fetch exists.
+    """
+
+    async def ensure_many(self, db: AsyncSession, pokemon: Dict[int, str]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Make sure verified pokemon rows exist for several Pokémon; the caller commits
+
+        Existing rows are read in one query and the PokeAPI lookups for the
+        others run concurrently before anything is written, so no write lock
+        is held across external calls. Call it before the transaction's
+        first write.
+
+        Args:
+            pokemon: {pokemon_id: pokemon_name}
+
+        Returns:
+            The verified data per pokemon_id, or None when PokeAPI did not
+            confirm it (unknown name, different id or unavailable)
+        """
+        if not pokemon:
+            return {}
+        result = await db.execute(
+            select(Pokemon.pokemon_id, Pokemon.data)
+            .where(Pokemon.pokemon_id.in_(pokemon.keys()), Pokemon.verified.is_(True))
+        )
+        shared: Dict[int, Optional[Dict[str, Any]]] = dict(result.all())
+
+        missing = {pokemon_id: name for pokemon_id, name in pokemon.items() if pokemon_id not in shared}
+        fetched = await pokeapi_service.get_many(missing.values())
+
+        for pokemon_id, pokemon_name in missing.items():
+            data = fetched.get(pokemon_name)
+            if data is None or data.get("id") != pokemon_id:
+                shared[pokemon_id] = None
+                continue
+
+            await db.execute(insert_ignore(db, Pokemon, {
+                "pokemon_id": pokemon_id,
+                "name": data.get("name") or pokemon_name,
+                "data": data,
+                "content_hash": content_hash(data),
+                "version": 1,
+                "verified": True,
+            }))
+            # Rows that only had their own client payload now show the shared data
+            await db.execute(
+                update(Collection)
+                .where(Collection.pokemon_id == pokemon_id, Collection.client_data.isnot(None))
+                .values(client_data=None)
+            )
+            await bump_versions_for_pokemon(db, pokemon_id)
+            shared[pokemon_id] = data
+        return shared
+
+    async def ensure(self, db: AsyncSession, pokemon_id: int, pokemon_name: str) -> Optional[Dict[str, Any]]:
+        """ensure_many for a single Pokémon"""
+        return (await self.ensure_many(db, {pokemon_id: pokemon_name}))[pokemon_id]
+
+
+# Singleton instance
+pokemon_store = PokemonStore()
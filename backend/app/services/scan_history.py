@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import insert
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.scan_event import ScanEvent
+
+logger = logging.getLogger(__name__)
+
+
+class ScanHistoryService:
+    """Write-behind buffer for scan events
+
+    The scan endpoint only appends to an in-memory deque; a background task
+    writes the buffered events with multi-row INSERTs once ``batch_size``
+    events are pending or every ``flush_interval`` seconds, whichever comes
+    first. The buffer holds at most ``max_buffer`` events: when the database
+    cannot keep up, the oldest events are dropped (and counted) rather than
+    growing memory without bound. Call ``flush()`` on shutdown so buffered
+    events are not lost.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.SCAN_HISTORY_BATCH_SIZE,
+        flush_interval: float = settings.SCAN_HISTORY_FLUSH_SECONDS,
+        max_buffer: int = settings.SCAN_HISTORY_MAX_BUFFER,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def record(
+        self,
+        user_id: int,
+        pokemon_name: Optional[str],
+        pokemon_id: Optional[int],
+        latency: float,
+        cache_hit: bool,
+        preprocess_tier: str,
+    ) -> None:
+        """Buffer one scan event; never touches the database"""
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append({
+            "user_id": user_id,
+            "scanned_at": datetime.utcnow(),
+            "pokemon_name": pokemon_name[:100] if pokemon_name else None,
+            "pokemon_id": pokemon_id,
+            "success": pokemon_id is not None,
+            "latency_ms": int(latency * 1000),
+            "cache_hit": cache_hit,
+            "preprocess_tier": preprocess_tier,
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def has_pending(self, user_id: int) -> bool:
+        return any(event["user_id"] == user_id for event in self._buffer)
+
+    async def flush(self) -> int:
+        """Write all buffered events; returns how many were written"""
+        async with self._lock:
+            if not self._buffer:
+                return 0
+            rows: List[Dict[str, Any]] = list(self._buffer)
+            self._buffer.clear()
+            try:
+                async with AsyncSessionLocal() as db:
+                    for start in range(0, len(rows), self.batch_size):
+                        await db.execute(insert(ScanEvent).values(rows[start:start + self.batch_size]))
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Scan history flush of {len(rows)} events failed: {e}")
+                self._requeue(rows)
+                return 0
+            except BaseException:
+                # Cancelled mid-write (e.g. on shutdown): keep the events for the final flush
+                self._requeue(rows)
+                raise
+            return len(rows)
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        """Put unwritten rows back ahead of newer events, within the bound"""
+        space = self.max_buffer - len(self._buffer)
+        keep = rows[-space:] if space > 0 else []
+        self.dropped += len(rows) - len(keep)
+        self._buffer.extendleft(reversed(keep))
+
+    async def run(self) -> None:
+        """Background loop: flush on the size trigger or the interval"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._buffer), "dropped": self.dropped}
+
+
+# Singleton instance
+scan_history = ScanHistoryService()
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import delete, or_, select, update
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.scan_job import ScanJob
+from app.services.scan_pipeline import scan_image
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "failed")
+REMOTE_POLL_SECONDS = 1.0  # How often jobs owned by another process are re-read
+STALE_JOB_SECONDS = 86400  # Unfinished rows older than this belonged to a dead process
+
+
+class LocalScanJob:
+    """A job accepted by this process; holds the image until a worker takes it"""
+
+    __slots__ = (
+        "id", "user_id", "image_bytes", "status", "stage", "pokemon_name",
+        "result", "error", "created_at", "finished_at", "changed", "history",
+    )
+
+    def __init__(self, user_id: int, image_bytes: bytes):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.image_bytes: Optional[bytes] = image_bytes
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.pokemon_name: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        # Replaced on every change; observers wait on the instance they saw
+        self.changed = asyncio.Event()
+        # Every state the job went through, so listeners see each stage
+        self.history: List[Dict[str, Any]] = [self.snapshot()]
+
+    def touch(self) -> None:
+        self.history.append(self.snapshot())
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "pokemon_name": self.pokemon_name,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _row_snapshot(row: ScanJob) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "status": row.status,
+        "stage": row.stage,
+        "pokemon_name": row.pokemon_name,
+        "result": row.result,
+        "error": {"status_code": row.error_status, "detail": row.error_detail} if row.error_status else None,
+        "created_at": row.created_at,
+        "finished_at": row.finished_at,
+    }
+
+
+class ScanJobQueue:
+    """Bounded queue of scan jobs processed by a fixed pool of workers
+
+    submit() only enqueues and returns the job id, so the HTTP request ends
+    before preprocessing and the Gemini call start. At most ``workers`` jobs
+    run at once; when ``max_queue`` jobs are already waiting, new ones are
+    rejected with 503 and Retry-After instead of queueing without bound.
+
+    Status changes are written to the scan_jobs table so a job can be read
+    through any worker process; the owning process additionally keeps
+    stage-level progress in memory and notifies event-stream listeners.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.SCAN_JOB_WORKERS,
+        max_queue: int = settings.SCAN_JOB_QUEUE_SIZE,
+        ttl: float = settings.SCAN_JOB_TTL_SECONDS,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.rejected = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._jobs: Dict[str, LocalScanJob] = {}
+        self._running = 0
+        self._reserved = 0  # Submits between the capacity check and put_nowait
+        self._latency_ewma = 5.0
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._queue.qsize() * self._latency_ewma / max(1, self.workers)))
+
+    async def submit(self, user_id: int, image_bytes: bytes) -> Dict[str, Any]:
+        """Queue a scan and return the job snapshot
+
+        Raises:
+            HTTPException: 503 with Retry-After when the queue is full
+        """
+        # Reserve the queue slot before awaiting the insert, so concurrent
+        # submits cannot all pass the check and overflow the queue
+        if self._queue.qsize() + self._reserved >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Scan queue is full. Please try again shortly.",
+                headers={"Retry-After": str(self._retry_after())},
+            )
+        self._reserved += 1
+        try:
+            job = LocalScanJob(user_id, image_bytes)
+            async with AsyncSessionLocal() as db:
+                db.add(ScanJob(id=job.id, user_id=user_id, status=job.status, created_at=job.created_at))
+                await db.commit()
+        finally:
+            self._reserved -= 1
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job.snapshot()
+
+    async def _persist(self, job: LocalScanJob) -> None:
+        values = {
+            "status": job.status,
+            "stage": job.stage,
+            "pokemon_name": job.pokemon_name[:100] if job.pokemon_name else None,
+            "result": job.result,
+            "error_status": job.error["status_code"] if job.error else None,
+            "error_detail": job.error["detail"][:255] if job.error else None,
+            "finished_at": job.finished_at,
+        }
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(ScanJob).where(ScanJob.id == job.id).values(**values))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Could not store state of scan job {job.id}: {e}")
+
+    def _finish(self, job: LocalScanJob, error: Optional[Dict[str, Any]] = None) -> None:
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        job.image_bytes = None
+        job.touch()
+
+    async def _process(self, job: LocalScanJob) -> None:
+        job.status = "running"
+        job.touch()
+        await self._persist(job)
+
+        def on_stage(stage: str) -> None:
+            job.stage = stage
+            job.touch()
+
+        started = asyncio.get_running_loop().time()
+        try:
+            result = await scan_image(job.user_id, job.image_bytes, on_stage)
+            job.pokemon_name, job.result = result
+            self._finish(job)
+        except HTTPException as e:
+            self._finish(job, {"status_code": e.status_code, "detail": str(e.detail)})
+        except Exception as e:
+            logger.exception(f"Scan job {job.id} failed")
+            self._finish(job, {"status_code": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": f"Scan failed: {type(e).__name__}"})
+        latency = asyncio.get_running_loop().time() - started
+        self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+        await self._persist(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            try:
+                await self._process(job)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _prune(self) -> None:
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.ttl)
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(ScanJob).where(or_(
+                    ScanJob.finished_at < cutoff,
+                    ScanJob.created_at < now - timedelta(seconds=STALE_JOB_SECONDS),
+                )))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Scan job cleanup failed: {e}")
+
+    async def run(self) -> None:
+        """Background task: run the worker pool and drop expired jobs"""
+        workers: List[asyncio.Task] = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            while True:
+                await asyncio.sleep(min(self.ttl, 60))
+                await self._prune()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def shutdown(self) -> int:
+        """Mark jobs this process will not finish as failed; returns how many"""
+        unfinished = [job for job in self._jobs.values() if job.status not in FINISHED]
+        for job in unfinished:
+            self._finish(job, {"status_code": status.HTTP_503_SERVICE_UNAVAILABLE, "detail": "Server restarted; submit the scan again"})
+            await self._persist(job)
+        return len(unfinished)
+
+    async def get(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Job snapshot, or None when it does not exist (or belongs to another user)"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.snapshot() if job.user_id == user_id else None
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(ScanJob).where(ScanJob.id == job_id, ScanJob.user_id == user_id)
+            )).scalar_one_or_none()
+        return _row_snapshot(row) if row is not None else None
+
+    async def watch(self, job_id: str, user_id: int, keepalive: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the job snapshot on every change until it finishes
+
+        Yields None after ``keepalive`` seconds without a change. Jobs run by
+        this process yield every state they went through; jobs run by another
+        process are re-read from the database every second, so only their
+        status changes (not every stage) are seen.
+        """
+        last = None
+        seen = 0
+        idle = 0.0
+        while True:
+            job = self._jobs.get(job_id)
+            if job is not None and job.user_id == user_id:
+                changed = job.changed
+                snapshots = job.history[seen:]
+                seen = len(job.history)
+            else:
+                changed = None
+                snapshot = await self.get(job_id, user_id)
+                if snapshot is None:
+                    return
+                snapshots = [snapshot] if snapshot != last else []
+
+            for snapshot in snapshots:
+                last, idle = snapshot, 0.0
+                yield snapshot
+                if snapshot["status"] in FINISHED:
+                    return
+
+            wait = keepalive - idle if changed is not None else min(REMOTE_POLL_SECONDS, keepalive - idle)
+            try:
+                if changed is not None:
+                    await asyncio.wait_for(changed.wait(), timeout=wait)
+                    continue
+                await asyncio.sleep(wait)
+                idle += wait
+            except asyncio.TimeoutError:
+                idle += wait
+            if idle >= keepalive:
+                idle = 0.0
+                yield None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "rejected": self.rejected,
+            "latency_ewma": round(self._latency_ewma, 3),
+        }
+
+
+# Singleton instance
+scan_jobs = ScanJobQueue()
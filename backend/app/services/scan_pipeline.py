@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, status
+from app.config import settings
+from app.core.admission import scan_admission
+from app.services.gemini_service import gemini_service
+from app.services.pokeapi_service import pokeapi_service
+from app.services.image_processor import image_processor
+from app.services.scan_history import scan_history
+
+# Progress reported to on_stage, in order
+SCAN_STAGES = ("decoded", "preprocessed", "identified", "enriched")
+
+
+class ScanResult(NamedTuple):
+    """Name as returned by the recognizer and the PokeAPI data it resolved to"""
+    pokemon_name: str
+    pokemon_data: Dict[str, Any]
+
+
+class CascadeStats:
+    """Per-tier counts of recognition attempts and of attempts that resolved
+
+    Tiers: "thumbnail" (first, cheap attempt), "enhanced" (full preprocessed
+    frame) and "original" (the upload as-is, when it could not be decoded).
+    """
+
+    TIERS = ("thumbnail", "enhanced", "original")
+
+    def __init__(self):
+        self.attempts = dict.fromkeys(self.TIERS, 0)
+        self.hits = dict.fromkeys(self.TIERS, 0)
+
+    def record(self, tier: str, resolved: bool) -> None:
+        self.attempts[tier] += 1
+        if resolved:
+            self.hits[tier] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            tier: {
+                "attempts": self.attempts[tier],
+                "hits": self.hits[tier],
+                "hit_rate": round(self.hits[tier] / self.attempts[tier], 3) if self.attempts[tier] else None,
+            }
+            for tier in self.TIERS
+        }
+
+
+# Singleton instance
+cascade_stats = CascadeStats()
+
+
+def _prepare_tier(tier: str, img: Optional[Any], image_bytes: bytes, mime_type: str) -> Tuple[str, bytes, str]:
+    """Image to send for a cascade tier, as (tier actually used, bytes, MIME type)"""
+    if tier == "thumbnail":
+        return tier, image_processor.thumbnail(
+            img, max_size=settings.SCAN_THUMBNAIL_SIZE, quality=settings.SCAN_THUMBNAIL_QUALITY
+        ), "image/jpeg"
+    if img is not None:
+        try:
+            return "enhanced", image_processor.preprocess_decoded(img), "image/jpeg"
+        except Exception as e:
+            print(f"Image preprocessing failed, using original: {e}")
+    else:
+        print("Image preprocessing failed, using original: Failed to decode image")
+    return "original", image_bytes, mime_type
+
+
+async def scan_image(
+    user_id: int,
+    image_bytes: bytes,
+    on_stage: Optional[Callable[[str], None]] = None,
+    mime_type: str = "image/jpeg",
+) -> ScanResult:
+    """
+    Identify the Pokémon in an image and fetch its data
+
+    Steps:
+    1. Decode the image and build a small thumbnail (resize and contrast
+       only), in a worker thread so the event loop stays free
+    2. Use Gemini Vision to identify the Pokémon name and fetch detailed
+       data from PokeAPI
+    3. If the thumbnail is not recognized or the name does not resolve,
+       repeat with the full preprocessed frame (resize, enhance, denoise)
+
+    With SCAN_CASCADE_ENABLED off, only the full frame is sent. The attempt
+    is recorded in the scan history whatever the outcome, with the tier
+    that produced the answer.
+
+    Args:
+        user_id: User the scan is recorded for
+        image_bytes: Uploaded image
+        on_stage: Called with each entry of SCAN_STAGES as it is first reached
+        mime_type: MIME type of image_bytes, used if they are sent as-is
+
+    Returns:
+        ScanResult
+
+    Raises:
+        HTTPException: 404 if no Pokémon was identified or PokeAPI does not know it
+    """
+    reported = set()
+
+    def stage(name: str) -> None:
+        if on_stage is not None and name not in reported:
+            reported.add(name)
+            on_stage(name)
+
+    started = time.perf_counter()
+    pokemon_name = None
+    pokemon_data = None
+    cache_hit = False
+    preprocess_tier = "original"
+    try:
+        img = await asyncio.to_thread(image_processor.decode_image, image_bytes)
+        stage("decoded")
+        tiers = ("thumbnail", "enhanced") if img is not None and settings.SCAN_CASCADE_ENABLED else ("enhanced",)
+
+        looked_up = None
+        for tier in tiers:
+            # Step 1: Preprocess image with OpenCV
+            preprocess_tier, candidate, candidate_mime = await asyncio.to_thread(
+                _prepare_tier, tier, img, image_bytes, mime_type
+            )
+            stage("preprocessed")
+
+            # Step 2: Identify Pokémon using Gemini
+            pokemon_name = await gemini_service.identify_pokemon(candidate, candidate_mime)
+            print(f"[DEBUG SCAN] Gemini identified Pokemon ({preprocess_tier}): '{pokemon_name}'")
+            if pokemon_name:
+                stage("identified")
+                # Step 3: Fetch Pokémon data from PokeAPI (once per distinct name)
+                if pokemon_name != looked_up:
+                    print(f"[DEBUG SCAN] Fetching PokeAPI data for: '{pokemon_name}'")
+                    cache_hit = pokeapi_service.is_cached(pokemon_name)
+                    pokemon_data = await pokeapi_service.get_pokemon_data(pokemon_name)
+                    looked_up = pokemon_name
+                    print(f"[DEBUG SCAN] PokeAPI returned data: {pokemon_data is not None}")
+
+            cascade_stats.record(preprocess_tier, pokemon_data is not None)
+            if pokemon_data:
+                break
+
+        if not pokemon_name:
+            print("[DEBUG SCAN] Gemini failed to identify a Pokemon in the image")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Could not identify a Pokémon in the image"
+            )
+
+        if not pokemon_data:
+            print(f"[DEBUG] PokeAPI failed to find Pokemon: {pokemon_name}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Pokémon '{pokemon_name}' not found in PokeAPI"
+            )
+        stage("enriched")
+        return ScanResult(pokemon_name, pokemon_data)
+    finally:
+        # Buffered only; written to the database in batches in the background
+        scan_history.record(
+            user_id,
+            pokemon_data["name"] if pokemon_data else pokemon_name,
+            pokemon_data["id"] if pokemon_data else None,
+            time.perf_counter() - started,
+            cache_hit,
+            preprocess_tier,
+        )
+
+
+async def scan_regions(
+    user_id: int,
+    image_bytes: bytes,
+    max_regions: int,
+    on_regions: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Identify every Pokémon in a photo with several of them (binder page, screen)
+
+    The image is decoded once; up to max_regions object regions are
+    detected and cropped from it (the whole frame is used when none are
+    found). The crops are identified concurrently, each under its own
+    scan admission slot, and each distinct name is looked up once. One
+    scan event is recorded per region.
+
+    Args:
+        user_id: User the scans are recorded for
+        image_bytes: Uploaded image
+        max_regions: Most regions to identify
+        on_regions: Awaited with the number of regions before any is
+            identified; may raise to reject the scan (e.g. rate limit)
+
+    Returns:
+        One result per region, largest region first:
+        {"box": {x, y, width, height}, "status", "pokemon_name", "pokemon"}
+        with status "found", "not_found" (name unknown to PokeAPI) or
+        "not_identified"
+
+    Raises:
+        HTTPException: 400 if the image cannot be decoded, 503 if a region
+            is not admitted
+    """
+    started = time.perf_counter()
+    img = await asyncio.to_thread(image_processor.decode_image, image_bytes)
+    if img is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not decode image"
+        )
+
+    def prepare_regions():
+        boxes = image_processor.detect_object_regions(img, max_regions=max_regions)
+        if not boxes:
+            height, width = img.shape[:2]
+            boxes = [(0, 0, width, height)]
+        crops = [image_processor.preprocess_decoded(image_processor.crop_region(img, box)) for box in boxes]
+        return boxes, crops
+
+    boxes, crops = await asyncio.to_thread(prepare_regions)
+    if on_regions is not None:
+        await on_regions(len(boxes))
+
+    async def identify(crop: bytes) -> Optional[str]:
+        async with scan_admission.slot():
+            return await gemini_service.identify_pokemon(crop)
+
+    # Every region finishes (and frees its slot) before a rejection is raised
+    names = await asyncio.gather(*(identify(crop) for crop in crops), return_exceptions=True)
+    for name in names:
+        if isinstance(name, BaseException):
+            raise name
+
+    identified = [name for name in names if name]
+    cache_hits = {name: pokeapi_service.is_cached(name) for name in identified}
+    pokemon_by_name = await pokeapi_service.get_many(identified)
+
+    latency = time.perf_counter() - started
+    results = []
+    for (x, y, w, h), name in zip(boxes, names):
+        pokemon_data = pokemon_by_name.get(name) if name else None
+        scan_history.record(
+            user_id,
+            pokemon_data["name"] if pokemon_data else name,
+            pokemon_data["id"] if pokemon_data else None,
+            latency,
+            cache_hits.get(name, False),
+            "region",
+        )
+        results.append({
+            "box": {"x": x, "y": y, "width": w, "height": h},
+            "status": "found" if pokemon_data else ("not_found" if name else "not_identified"),
+            "pokemon_name": name,
+            "pokemon": pokemon_data,
+        })
+    return results
+
+
+async def scan_batch(user_id: int, images: List[Optional[bytes]]) -> List[Dict[str, Any]]:
+    """
+    Identify the Pokémon in many uploaded images at once
+
+    Identical images (same SHA-256) are scanned once. Each distinct image
+    is decoded and preprocessed in a worker thread and sent to Gemini as
+    soon as it is ready, so preprocessing overlaps recognition; the number
+    of model requests in flight is bounded by Gemini's concurrency limit.
+    Names are then resolved together, each distinct one once. One scan
+    event is recorded per distinct image.
+
+    Args:
+        user_id: User the scans are recorded for
+        images: Uploaded images in request order; None for uploads that
+            were rejected before reading (e.g. not an image)
+
+    Returns:
+        One result per upload, in order:
+        {"index", "status", "pokemon_name", "pokemon", "duplicate_of", "detail"}
+        with status "found", "not_found", "not_identified" or "invalid";
+        duplicate_of is the index of the identical upload that was scanned
+    """
+    started = time.perf_counter()
+
+    first_index: Dict[str, int] = {}
+    duplicate_of: List[Optional[int]] = []
+    for index, data in enumerate(images):
+        if data is None:
+            duplicate_of.append(None)
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        duplicate_of.append(first_index.get(digest))
+        first_index.setdefault(digest, index)
+    unique = list(first_index.values())
+
+    def prepare(data: bytes) -> Optional[bytes]:
+        # A bad upload becomes its own "invalid" result, never a failed batch
+        try:
+            img = image_processor.decode_image(data)
+        except Exception as e:
+            print(f"Error decoding image: {e}")
+            img = None
+        if img is None:
+            return None
+        try:
+            return image_processor.preprocess_decoded(img)
+        except Exception as e:
+            print(f"Image preprocessing failed, using original: {e}")
+            return data
+
+    async def recognize(data: bytes) -> Tuple[bool, Optional[str]]:
+        processed = await asyncio.to_thread(prepare, data)
+        if processed is None:
+            return False, None
+        return True, await gemini_service.identify_pokemon(processed)
+
+    recognized = dict(zip(unique, await asyncio.gather(*(recognize(images[index]) for index in unique))))
+
+    identified = [name for _, name in recognized.values() if name]
+    cache_hits = {name: pokeapi_service.is_cached(name) for name in identified}
+    pokemon_by_name = await pokeapi_service.get_many(identified)
+
+    latency = time.perf_counter() - started
+    results = []
+    for index, data in enumerate(images):
+        result = {
+            "index": index,
+            "status": "invalid",
+            "pokemon_name": None,
+            "pokemon": None,
+            "duplicate_of": duplicate_of[index],
+            "detail": None,
+        }
+        results.append(result)
+        if data is None:
+            result["detail"] = "File must be an image"
+            continue
+        decoded, name = recognized[index if duplicate_of[index] is None else duplicate_of[index]]
+        if not decoded:
+            result["detail"] = "Could not decode image"
+            continue
+        pokemon_data = pokemon_by_name.get(name) if name else None
+        result["pokemon_name"] = name
+        result["pokemon"] = pokemon_data
+        if pokemon_data:
+            result["status"] = "found"
+        elif name:
+            result["status"] = "not_found"
+            result["detail"] = f"Pokémon '{name}' not found in PokeAPI"
+        else:
+            result["status"] = "not_identified"
+            result["detail"] = "Could not identify a Pokémon in the image"
+
+        if duplicate_of[index] is None:
+            scan_history.record(
+                user_id,
+                pokemon_data["name"] if pokemon_data else name,
+                pokemon_data["id"] if pokemon_data else None,
+                latency,
+                cache_hits.get(name, False),
+                "batch",
+            )
+    return results
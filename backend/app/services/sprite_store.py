@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.config import settings
+
+# Public variant name -> path below the sprite source, as in PokeAPI's sprites repository
+SPRITE_VARIANTS = {
+    "default": "{id}.png",
+    "shiny": "shiny/{id}.png",
+    "back": "back/{id}.png",
+    "back-shiny": "back/shiny/{id}.png",
+    "artwork": "other/official-artwork/{id}.png",
+    "artwork-shiny": "other/official-artwork/shiny/{id}.png",
+    "home": "other/home/{id}.png",
+    "home-shiny": "other/home/shiny/{id}.png",
+}
+
+# Thumbnail formats in order of preference, with their OpenCV encoder settings
+THUMBNAIL_FORMATS = {
+    "avif": ("image/avif", ".avif", "IMWRITE_AVIF_QUALITY", 60),
+    "webp": ("image/webp", ".webp", "IMWRITE_WEBP_QUALITY", 80),
+    "png": ("image/png", ".png", "IMWRITE_PNG_COMPRESSION", 9),
+}
+
+MISSING_TTL = 3600  # Seconds a sprite the source does not have is not asked for again
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _render_thumbnail(source_path: str, target_path: str, size: int, image_format: str) -> None:
+    """Downscale a sprite to fit in size x size (alpha kept) and encode it"""
+    import cv2
+
+    img = cv2.imread(source_path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError(f"Failed to decode {source_path}")
+
+    height, width = img.shape[:2]
+    scale = size / max(height, width)
+    if scale < 1:
+        img = cv2.resize(
+            img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA
+        )
+
+    _, extension, quality_flag, quality = THUMBNAIL_FORMATS[image_format]
+    ok, buffer = cv2.imencode(extension, img, [getattr(cv2, quality_flag), quality])
+    if not ok:
+        raise ValueError(f"Failed to encode {image_format} thumbnail")
+    _write_atomic(target_path, buffer.tobytes())
+
+
+class SpriteStore:
+    """On-disk, content-addressed cache of Pokémon sprites and their thumbnails
+
+    Layout below ``root``:
+        refs/{id}/{variant}          sha256 of the sprite's original image
+        objects/{ab}/{sha256}.png    original image, fetched once from the source
+        thumbs/{ab}/{sha256}-{size}.{format}
+
+    Identical images (e.g. shared by several forms) are stored once, and
+    thumbnails are derived from the content hash, so they never go stale.
+    The source is the PokeAPI sprites repository by default; a local
+    directory with the same layout works too (e.g. fixtures). Concurrent
+    requests for the same missing file share one fetch or render.
+    """
+
+    def __init__(self, root: str = settings.SPRITE_CACHE_DIR, source: str = settings.SPRITE_SOURCE_URL):
+        self.root = root
+        self.source = source
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._missing: Dict[Tuple[int, str], float] = {}
+        self._formats = None
+
+    def supported_formats(self) -> Tuple[str, ...]:
+        """Thumbnail formats the installed OpenCV can encode, preferred first"""
+        if self._formats is None:
+            import cv2
+            self._formats = tuple(
+                name for name, (_, extension, flag, _) in THUMBNAIL_FORMATS.items()
+                if hasattr(cv2, flag) and cv2.haveImageWriter(f"x{extension}")
+            )
+        return self._formats
+
+    def _ref_path(self, pokemon_id: int, variant: str) -> str:
+        return os.path.join(self.root, "refs", str(pokemon_id), variant)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.png")
+
+    def thumbnail_path(self, digest: str, size: int, image_format: str) -> str:
+        return os.path.join(self.root, "thumbs", digest[:2], f"{digest}-{size}.{image_format}")
+
+    async def _single_flight(self, key: str, produce: Callable[[], Awaitable]):
+        """Run produce() once for concurrent callers with the same key
+
+        If the caller running produce() is cancelled (timeout, disconnect,
+        shutdown), the waiting callers are released and one of them runs it
+        again.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This caller was cancelled, not the one producing
+            return await self._single_flight(key, produce)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await produce()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.cancel()
+
+    async def _fetch(self, pokemon_id: int, variant: str) -> Optional[bytes]:
+        """Original image bytes from the source, or None when it has none"""
+        path = SPRITE_VARIANTS[variant].format(id=pokemon_id)
+        if not self.source.startswith(("http://", "https://")):
+            try:
+                return await asyncio.to_thread(_read_file, os.path.join(self.source, path))
+            except FileNotFoundError:
+                return None
+
+        from app.services.pokeapi_service import pokeapi_service
+        url = f"{self.source.rstrip('/')}/{path}"
+        print(f"[SPRITE FETCH] {url}")
+        response = await pokeapi_service.client.get(url)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    async def original(self, pokemon_id: int, variant: str) -> Optional[str]:
+        """sha256 of the sprite's original image, fetching and storing it on first use
+
+        Returns:
+            The digest (see object_path), or None if the source has no such sprite
+        """
+        ref_path = self._ref_path(pokemon_id, variant)
+        try:
+            with open(ref_path) as f:
+                digest = f.read().strip()
+            if os.path.exists(self.object_path(digest)):
+                return digest
+        except FileNotFoundError:
+            pass
+
+        missing_until = self._missing.get((pokemon_id, variant))
+        if missing_until is not None and time.monotonic() < missing_until:
+            return None
+
+        async def fetch_and_store() -> Optional[str]:
+            data = await self._fetch(pokemon_id, variant)
+            if data is None or len(data) > settings.SPRITE_MAX_BYTES:
+                self._missing[(pokemon_id, variant)] = time.monotonic() + MISSING_TTL
+                return None
+            digest = hashlib.sha256(data).hexdigest()
+            object_path = self.object_path(digest)
+            if not os.path.exists(object_path):
+                await asyncio.to_thread(_write_atomic, object_path, data)
+            await asyncio.to_thread(_write_atomic, ref_path, digest.encode())
+            return digest
+
+        return await self._single_flight(f"{pokemon_id}/{variant}", fetch_and_store)
+
+    async def thumbnail(self, digest: str, size: int, image_format: str) -> str:
+        """Path of the resized thumbnail, rendering it on first use (off the event loop)"""
+        path = self.thumbnail_path(digest, size, image_format)
+        if os.path.exists(path):
+            return path
+
+        async def render() -> str:
+            await asyncio.to_thread(_render_thumbnail, self.object_path(digest), path, size, image_format)
+            return path
+
+        return await self._single_flight(path, render)
+
+
+# Singleton instance
+sprite_store = SpriteStore()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.bloom import BloomFilter
+from app.database import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationService:
+    """Revocation list for refresh tokens, fronted by an in-memory Bloom filter
+
+    The filter answers "definitely not revoked" for almost every request
+    without touching the database; only filter hits are confirmed against
+    the revoked_tokens table. The filter is snapshotted to disk on shutdown
+    and, on startup, restored from that snapshot and caught up with any rows
+    revoked after it was taken. A background task deletes rows whose token
+    has expired and rebuilds the filter from the remaining rows, since
+    entries cannot be removed from a Bloom filter.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.REVOCATION_FILTER_PATH,
+        capacity: int = settings.REVOCATION_FILTER_CAPACITY,
+        error_rate: float = settings.REVOCATION_FILTER_ERROR_RATE,
+        prune_interval: float = settings.REVOCATION_PRUNE_SECONDS,
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.prune_interval = prune_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        # {jti: expires_at} added since the last rebuild, possibly not committed yet
+        self._recent: Dict[str, datetime] = {}
+
+    def _read_snapshot(self) -> Optional[BloomFilter]:
+        """Load the persisted filter, or None if it is missing or unusable"""
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = BloomFilter.from_bytes(f.read(), self.capacity)
+        except OSError:
+            return None
+        if snapshot is None or snapshot.is_saturated:
+            return None
+        return snapshot
+
+    async def load(self, db: AsyncSession) -> None:
+        """Restore the filter from disk and the database"""
+        started = time.time()
+        snapshot = self._read_snapshot()
+        now = datetime.utcnow()
+
+        query = select(RevokedToken.jti).where(RevokedToken.expires_at > now)
+        if snapshot is not None:
+            # Only rows revoked after the snapshot was taken are missing from it
+            query = query.where(RevokedToken.revoked_at >= datetime.utcfromtimestamp(snapshot.created_at))
+
+        result = await db.execute(query)
+        jtis = result.scalars().all()
+
+        if snapshot is not None:
+            bloom = snapshot
+        else:
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        bloom.created_at = started
+
+        self._filter = bloom
+        logger.info(
+            f"Revocation filter loaded ({'snapshot + ' if snapshot else ''}{len(jtis)} rows from DB, "
+            f"{bloom.count} entries)"
+        )
+
+    def save(self) -> None:
+        """Persist the filter atomically so the next startup can skip a full rebuild"""
+        # One temp file per call: every server worker saves on shutdown
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.path)),
+                prefix=f"{os.path.basename(self.path)}.",
+                suffix=".tmp",
+            )
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._filter.to_bytes())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist revocation filter: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        """Check a refresh token id, consulting the DB only on filter hits"""
+        if jti not in self._filter:
+            return False
+
+        result = await db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti))
+        return result.scalar_one_or_none() is not None
+
+    async def revoke(self, db: AsyncSession, jti: str, user_id: int, expires_at: datetime) -> None:
+        """Record a revoked refresh token id; the caller commits the transaction
+
+        A duplicate jti violates the unique constraint on flush, which makes
+        concurrent reuse of the same refresh token fail for all but one caller.
+        """
+        db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=datetime.utcnow()))
+        await db.flush()
+        self._filter.add(jti)
+        self._recent[jti] = expires_at
+        if self._filter.count == self._filter.capacity + 1:
+            logger.warning("Revocation filter is over capacity; false-positive DB lookups will increase")
+
+    async def prune(self) -> int:
+        """Delete expired revocations and rebuild the filter from the live rows
+
+        Revocations made while the rows are read (or not yet committed when
+        the read starts) are carried into the new filter.
+
+        Returns:
+            Number of rows deleted
+        """
+        started = time.time()
+        carried, self._recent = self._recent, {}
+        now = datetime.utcnow()
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                await db.commit()
+                deleted = result.rowcount or 0
+                rows = await db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > now))
+                jtis = rows.scalars().all()
+        except BaseException:
+            self._recent.update(carried)
+            raise
+
+        live = set(jtis)
+        for recent in (carried, self._recent):
+            live.update(jti for jti, expires_at in recent.items() if expires_at > now)
+        bloom = BloomFilter(max(self.capacity, 2 * len(live)), self.error_rate)
+        for jti in live:
+            bloom.add(jti)
+        bloom.created_at = started
+        self._filter = bloom
+        logger.info(f"Revocation filter rebuilt: {deleted} expired rows deleted, {bloom.count} entries")
+        return deleted
+
+    async def run(self) -> None:
+        """Background loop: prune every prune_interval seconds"""
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.warning(f"Revocation cleanup failed: {e}")
+
+
+# Singleton instance
+token_revocation_service = TokenRevocationService()
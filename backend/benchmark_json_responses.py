@@ -0,0 +1,80 @@
+"""
+Benchmark: requests/s for cached Pokémon lookups, validated vs fast response path
+Run from the backend directory: python benchmark_json_responses.py [--requests 3000] [--encoding gzip]
+
+"before" serves the cached payload the old way (response_model validation,
+then the standard library JSON encoder); "after" is the real
+GET /pokemon/search/{name} route (trusted_json + orjson). Requests go
+through the ASGI stack in-process, so the numbers isolate per-request CPU
+cost; authentication is stubbed out. By default compression is disabled
+(Accept-Encoding: identity) so both sides do the same work otherwise;
+with --encoding gzip (or br), "before" is compressed per request by
+GZipMiddleware while "after" serves the variant stored with the cache entry.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+import httpx
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from app.main import app
+from app.config import settings
+from app.core.dependencies import get_current_active_user
+from app.models.user import User
+from app.schemas.pokemon import PokemonResponse
+from app.services.pokeapi_service import pokeapi_service
+from benchmark_pokemon_cache_memory import sample_pokemon
+
+POKEMON = [f"pokemon-{i}" for i in range(1, 51)]
+
+
+def add_legacy_route() -> None:
+    """Same lookup returning the dict, as the route did before; mounted on the
+    real app so both variants pass through the same middleware stack"""
+    async def search_pokemon(pokemon_name: str, current_user: User = Depends(get_current_active_user)):
+        return await pokeapi_service.get_pokemon_data(pokemon_name)
+
+    app.router.add_api_route(
+        "/legacy/pokemon/search/{pokemon_name}",
+        search_pokemon,
+        response_model=PokemonResponse,
+        response_class=JSONResponse,
+    )
+
+
+async def run(asgi_app, prefix: str, requests: int, encoding: str) -> float:
+    transport = httpx.ASGITransport(app=asgi_app)
+    headers = {"Accept-Encoding": encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        response = await client.get(f"{prefix}/pokemon/search/{POKEMON[0]}")
+        assert response.status_code == 200, response.text
+        started = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"{prefix}/pokemon/search/{POKEMON[i % len(POKEMON)]}")
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, encoding: str):
+    await pokeapi_service.prime_cache({f"pokemon-{i}": sample_pokemon(i) for i in range(1, len(POKEMON) + 1)})
+    app.dependency_overrides[get_current_active_user] = lambda: User(id=1, username="bench", email="bench@example.com")
+
+    # Silence the per-request [CACHE HIT] prints
+    with contextlib.redirect_stdout(io.StringIO()):
+        add_legacy_route()
+        before = await run(app, "/legacy", requests, encoding)
+        after = await run(app, settings.API_V1_PREFIX, requests, encoding)
+
+    print(f"Requests:                 {requests} (Accept-Encoding: {encoding})")
+    print(f"Before (validate + json): {before:>8,.0f} req/s")
+    print(f"After (trusted + orjson): {after:>8,.0f} req/s")
+    print(f"Speedup:                  {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--encoding", default="identity", help="Accept-Encoding sent by the client")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.encoding))
@@ -0,0 +1,121 @@
+"""
+Benchmark: bytes per cached Pokémon, plain dict tree vs compact PokemonRecord
+Run from the backend directory: python benchmark_pokemon_cache_memory.py [--count 500] [--snapshot pokedex.snapshot]
+
+Uses real payloads from a Pokédex snapshot when one is given, otherwise
+synthetic payloads with the same shape and URL patterns as PokeAPI's.
+"""
+import argparse
+import json
+import random
+import timeit
+import tracemalloc
+from app.services.pokemon_record import PokemonRecord, API_PREFIX, SPRITE_PREFIX, STANDARD_STATS
+
+TYPES = ["normal", "fire", "water", "grass", "electric", "ice", "fighting", "poison", "ground",
+         "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy"]
+ABILITIES = ["overgrow", "blaze", "torrent", "static", "intimidate", "levitate", "chlorophyll",
+             "swift-swim", "keen-eye", "inner-focus", "synchronize", "pressure", "sturdy"]
+
+
+def sample_pokemon(pokemon_id: int) -> dict:
+    """A payload shaped like PokeAPIService.get_pokemon_data output"""
+    rng = random.Random(pokemon_id)
+
+    def sprite(path):
+        return f"{SPRITE_PREFIX}{path}{pokemon_id}.png"
+
+    types = rng.sample(range(len(TYPES)), rng.choice([1, 2]))
+    abilities = rng.sample(range(len(ABILITIES)), rng.choice([2, 3]))
+    return {
+        "id": pokemon_id,
+        "name": f"pokemon-{pokemon_id}",
+        "height": rng.randint(2, 200),
+        "weight": rng.randint(1, 9999),
+        "types": [
+            {"slot": slot, "type": {"name": TYPES[t], "url": f"{API_PREFIX}type/{t + 1}/"}}
+            for slot, t in enumerate(types, start=1)
+        ],
+        "stats": [
+            {"base_stat": rng.randint(5, 255), "effort": rng.choice([0, 0, 1, 2]),
+             "stat": {"name": name, "url": f"{API_PREFIX}stat/{i}/"}}
+            for i, name in enumerate(STANDARD_STATS, start=1)
+        ],
+        "abilities": [
+            {"ability": {"name": ABILITIES[a], "url": f"{API_PREFIX}ability/{a + 1}/"},
+             "is_hidden": slot == 3, "slot": slot}
+            for slot, a in enumerate(abilities, start=1)
+        ],
+        "sprites": {
+            "front_default": sprite(""),
+            "front_shiny": sprite("shiny/"),
+            "other": {
+                "dream_world": {"front_default": f"{SPRITE_PREFIX}other/dream-world/{pokemon_id}.svg", "front_female": None},
+                "home": {"front_default": sprite("other/home/"), "front_female": None,
+                         "front_shiny": sprite("other/home/shiny/"), "front_shiny_female": None},
+                "official-artwork": {"front_default": sprite("other/official-artwork/"),
+                                     "front_shiny": sprite("other/official-artwork/shiny/")},
+                "showdown": {"back_default": sprite("other/showdown/back/"), "back_female": None,
+                             "back_shiny": sprite("other/showdown/back/shiny/"), "back_shiny_female": None,
+                             "front_default": sprite("other/showdown/"), "front_female": None,
+                             "front_shiny": sprite("other/showdown/shiny/"), "front_shiny_female": None},
+            },
+        },
+        "species_url": f"{API_PREFIX}pokemon-species/{pokemon_id}/",
+    }
+
+
+def load_payloads(count: int, snapshot_path: str):
+    """Serialized payloads; each measured entry is decoded fresh, like an HTTP response"""
+    if snapshot_path:
+        from app.services.pokedex_snapshot import PokedexSnapshot, HEADER, INDEX_ENTRY
+        snapshot = PokedexSnapshot(snapshot_path, check_interval=0)
+        payloads = []
+        for i in range(min(count, len(snapshot))):
+            name = INDEX_ENTRY.unpack_from(snapshot._mm, HEADER.size + i * INDEX_ENTRY.size)[0]
+            payloads.append(json.dumps(snapshot.get(name.rstrip(b"\0").decode())))
+        return payloads
+    return [json.dumps(sample_pokemon(i)) for i in range(1, count + 1)]
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500, help="entries (the cache holds at most 500)")
+    parser.add_argument("--snapshot", default="", help="read real payloads from this Pokédex snapshot")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.count, args.snapshot)
+    count = len(payloads)
+
+    # Warm the interning tables so both runs measure steady-state entries
+    PokemonRecord.from_dict(json.loads(payloads[0]))
+
+    dict_bytes = measure(lambda: [json.loads(p) for p in payloads])
+
+    def build_records():
+        return [PokemonRecord.from_dict(json.loads(p)) for p in payloads]
+    record_bytes = measure(build_records)
+
+    records = build_records()
+    assert all(r.to_dict() == json.loads(p) for r, p in zip(records, payloads)), "round trip mismatch"
+    to_dict = timeit.timeit(lambda: records[0].to_dict(), number=20000) / 20000
+
+    print(f"Entries:            {count}")
+    print(f"Dict tree:          {dict_bytes / count:>10,.0f} bytes per Pokémon  ({dict_bytes / 1024:,.0f} KiB total)")
+    print(f"PokemonRecord:      {record_bytes / count:>10,.0f} bytes per Pokémon  ({record_bytes / 1024:,.0f} KiB total)")
+    print(f"Reduction:          {dict_bytes / record_bytes:.1f}x")
+    print(f"to_dict() at edge:  {to_dict * 1e6:.1f} µs per cache hit")
+
+
+if __name__ == "__main__":
+    main()
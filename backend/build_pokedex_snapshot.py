@@ -0,0 +1,67 @@
+"""
+Build the shared Pokédex snapshot read by all workers (POKEDEX_SNAPSHOT_PATH)
+Usage (from the backend directory):
+    python build_pokedex_snapshot.py                 # verified rows of the pokemon table
+    python build_pokedex_snapshot.py --fetch 1025    # also fetch ids 1..1025 missing from the table
+    python build_pokedex_snapshot.py --output /path/to/pokedex.snapshot
+
+The file is replaced atomically; running workers pick it up within
+POKEDEX_SNAPSHOT_CHECK_SECONDS.
+"""
+import argparse
+import asyncio
+import os
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.pokemon import Pokemon
+from app.services.pokeapi_service import pokeapi_service
+from app.services.pokedex_snapshot import write_snapshot
+
+FETCH_CONCURRENCY = 8
+
+
+async def load_from_database() -> dict:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Pokemon.pokemon_id, Pokemon.name, Pokemon.data).where(Pokemon.verified.is_(True))
+        )
+        return {pokemon_id: (name, data) for pokemon_id, name, data in result.all()}
+
+
+async def fetch_missing(entries: dict, up_to_id: int) -> int:
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    fetched = 0
+
+    async def fetch(pokemon_id: int):
+        nonlocal fetched
+        async with semaphore:
+            data = await pokeapi_service.get_pokemon_data(str(pokemon_id))
+        if data and data.get("id") == pokemon_id:
+            entries[pokemon_id] = (data["name"], data)
+            fetched += 1
+
+    await asyncio.gather(*(fetch(i) for i in range(1, up_to_id + 1) if i not in entries))
+    await pokeapi_service.close()
+    return fetched
+
+
+async def main(output: str, fetch_up_to: int):
+    entries = await load_from_database()
+    print(f"Loaded {len(entries)} verified Pokémon from the database")
+    if fetch_up_to:
+        fetched = await fetch_missing(entries, fetch_up_to)
+        print(f"Fetched {fetched} more from PokeAPI")
+
+    written = write_snapshot(output, entries.values())
+    print(f"Wrote {written} Pokémon ({os.path.getsize(output):,} bytes) to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.POKEDEX_SNAPSHOT_PATH)
+    parser.add_argument("--fetch", type=int, default=0, metavar="MAX_ID", help="fetch missing ids up to MAX_ID")
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("POKEDEX_SNAPSHOT_PATH is empty; pass --output")
+    asyncio.run(main(args.output, args.fetch))
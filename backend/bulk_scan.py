@@ -0,0 +1,305 @@
+"""
+Offline bulk scan: identify every image under a directory without the HTTP API
+Usage (from the backend directory):
+    python bulk_scan.py photos/ --output results.ndjson
+    python bulk_scan.py photos/ --output results.csv --labels labels.csv
+    python bulk_scan.py photos/ --output results.csv --recognizer stub --no-resolve
+    python bulk_scan.py photos/ --output results.ndjson --recognizer mypackage.models:recognize
+
+Files are read and preprocessed (ImageProcessor) in a pool of worker
+processes and recognized concurrently in the event loop; at most
+--max-in-flight images are held in memory at once. Each result is
+appended to the output (CSV or NDJSON, by extension) as soon as it is
+ready, with per-stage timings in milliseconds. The output doubles as the
+checkpoint: running the same command again skips the files already in it.
+
+Recognizers:
+    gemini          GeminiService (needs GEMINI_API_KEY)
+    stub            Name taken from the file name ("pikachu_012.jpg" -> "pikachu"),
+                    for exercising the pipeline without model calls
+    module:function Any async function(image_bytes: bytes, path: str) -> Optional[str]
+
+--labels is a CSV with "path" (relative to the directory) and "pokemon"
+columns; when given, each row records the expected name and the summary
+reports accuracy.
+"""
+import argparse
+import asyncio
+import csv
+import importlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config import settings
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+FIELDS = [
+    "path", "status", "pokemon_name", "resolved_name", "pokemon_id", "label", "correct",
+    "read_ms", "preprocess_ms", "recognize_ms", "resolve_ms", "detail",
+]
+
+Recognizer = Callable[[bytes, str], Awaitable[Optional[str]]]
+
+
+def normalize(name: Optional[str]) -> Optional[str]:
+    return name.strip().lower().replace(" ", "-") if name else None
+
+
+def find_images(root: str) -> List[str]:
+    """Image paths under root, relative to it, in a stable order"""
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.relpath(os.path.join(directory, name), root))
+    return paths
+
+
+def preprocess_file(path: str) -> Tuple[Optional[bytes], float, float, Optional[str]]:
+    """Worker process: read and preprocess one image
+
+    Returns:
+        (processed bytes or None, read seconds, preprocess seconds, error)
+    """
+    from app.services.image_processor import image_processor
+
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return None, time.perf_counter() - started, 0.0, f"Could not read file: {e}"
+    read_done = time.perf_counter()
+
+    try:
+        img = image_processor.decode_image(data)
+    except Exception as e:
+        return None, read_done - started, time.perf_counter() - read_done, f"Could not decode image: {e}"
+    if img is None:
+        return None, read_done - started, time.perf_counter() - read_done, "Could not decode image"
+    try:
+        processed = image_processor.preprocess_decoded(img)
+    except Exception as e:
+        print(f"Image preprocessing failed, using original: {e}")
+        processed = data
+    return processed, read_done - started, time.perf_counter() - read_done, None
+
+
+async def gemini_recognizer(image_bytes: bytes, path: str) -> Optional[str]:
+    from app.services.gemini_service import gemini_service
+
+    return await gemini_service.identify_pokemon(image_bytes)
+
+
+async def stub_recognizer(image_bytes: bytes, path: str) -> Optional[str]:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return normalize(re.sub(r"[\s_-]*\d+$", "", stem)) or None
+
+
+def load_recognizer(spec: str) -> Recognizer:
+    if spec == "gemini":
+        return gemini_recognizer
+    if spec == "stub":
+        return stub_recognizer
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise SystemExit(f"Unknown recognizer {spec!r}; use gemini, stub or module:function")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def load_labels(path: Optional[str]) -> Dict[str, str]:
+    if not path:
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {os.path.normpath(row["path"]): normalize(row["pokemon"]) for row in csv.DictReader(f)}
+
+
+def output_format(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def load_checkpoint(path: str, fmt: str) -> List[Dict[str, Any]]:
+    """Rows already written by an earlier run
+
+    A line cut off by an interrupted run is truncated away, so that file is
+    scanned again.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb+") as f:
+        content = f.read()
+        complete = content[:content.rfind(b"\n") + 1]
+        if len(complete) != len(content):
+            f.truncate(len(complete))
+    text = complete.decode("utf-8")
+    if fmt == "csv":
+        return list(csv.DictReader(text.splitlines()))
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class ResultWriter:
+    """Appends result rows to the output, flushed per row so progress survives interruption"""
+
+    def __init__(self, path: str, fmt: str):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._file, fieldnames=FIELDS) if fmt == "csv" else None
+        if self._csv is not None and new_file:
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+async def scan_file(
+    root: str,
+    path: str,
+    pool: ProcessPoolExecutor,
+    recognize: Recognizer,
+    recognize_slots: asyncio.Semaphore,
+    resolve: bool,
+    label: Optional[str],
+) -> Dict[str, Any]:
+    row: Dict[str, Any] = {field: None for field in FIELDS}
+    row.update(path=path, label=label)
+
+    loop = asyncio.get_running_loop()
+    processed, read_s, preprocess_s, error = await loop.run_in_executor(pool, preprocess_file, os.path.join(root, path))
+    row.update(read_ms=round(read_s * 1000, 1), preprocess_ms=round(preprocess_s * 1000, 1))
+    if processed is None:
+        row.update(status="invalid", detail=error)
+        return row
+
+    started = time.perf_counter()
+    try:
+        async with recognize_slots:
+            name = normalize(await recognize(processed, path))
+    except Exception as e:
+        row.update(status="error", detail=f"Recognizer failed: {type(e).__name__}: {e}")
+        return row
+    finally:
+        row["recognize_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if name == "unknown":
+        name = None
+    row["pokemon_name"] = name
+
+    if not name:
+        row["status"] = "not_identified"
+    elif not resolve:
+        row["status"] = "identified"
+    else:
+        from app.services.pokeapi_service import pokeapi_service
+
+        started = time.perf_counter()
+        pokemon_data = await pokeapi_service.get_pokemon_data(name)
+        row["resolve_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if pokemon_data:
+            row.update(status="found", resolved_name=pokemon_data["name"], pokemon_id=pokemon_data["id"])
+        else:
+            row["status"] = "not_found"
+
+    if label is not None:
+        row["correct"] = (row["resolved_name"] or name) == label
+    return row
+
+
+def summarize(rows: List[Dict[str, Any]], scanned: int, elapsed: float) -> None:
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    print(f"Scanned {scanned} files in {elapsed:.1f}s ({scanned / elapsed if elapsed else 0:.1f}/s); "
+          f"{len(rows)} in output: {counts}")
+
+    for stage in ("read_ms", "preprocess_ms", "recognize_ms", "resolve_ms"):
+        values = [float(row[stage]) for row in rows if row.get(stage) not in (None, "")]
+        if values:
+            values.sort()
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            print(f"  {stage:<14} mean {sum(values) / len(values):8.1f}  p95 {p95:8.1f}")
+
+    labelled = [row for row in rows if row.get("label")]
+    if labelled:
+        # CSV rows come back as strings
+        correct = sum(1 for row in labelled if row["correct"] in (True, "True"))
+        print(f"Accuracy: {correct}/{len(labelled)} = {correct / len(labelled):.1%}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    fmt = output_format(args.output, args.format)
+    done_rows = load_checkpoint(args.output, fmt)
+    done = {os.path.normpath(row["path"]) for row in done_rows}
+    labels = load_labels(args.labels)
+    recognize = load_recognizer(args.recognizer)
+
+    paths = [path for path in find_images(args.directory) if os.path.normpath(path) not in done]
+    print(f"{len(paths)} images to scan ({len(done)} already in {args.output})")
+
+    writer = ResultWriter(args.output, fmt)
+    rows = list(done_rows)
+    window = asyncio.Semaphore(args.max_in_flight)
+    recognize_slots = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+
+    async def run_one(path: str) -> None:
+        label = labels.get(os.path.normpath(path))
+        try:
+            try:
+                row = await scan_file(args.directory, path, pool, recognize, recognize_slots, not args.no_resolve, label)
+            except Exception as e:
+                # One bad file must not abort a resumable run
+                row = {field: None for field in FIELDS}
+                row.update(path=path, label=label, status="error", detail=f"{type(e).__name__}: {e}")
+            writer.write(row)
+            rows.append(row)
+            if len(rows) % 100 == 0:
+                print(f"{len(rows) - len(done_rows)}/{len(paths)} scanned")
+        finally:
+            window.release()
+
+    tasks = []
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # Files are submitted as slots free up rather than all at once,
+            # so memory stays bounded on large archives
+            for path in paths:
+                await window.acquire()
+                tasks.append(asyncio.create_task(run_one(path)))
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        # Tasks still running after an interruption must not write to a closed file
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+        from app.services.pokeapi_service import pokeapi_service
+
+        await pokeapi_service.close()
+
+    summarize(rows, len(paths), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Identify every image under a directory")
+    parser.add_argument("directory")
+    parser.add_argument("--output", required=True, help="results file (.csv or .ndjson); also the resume checkpoint")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="override the format chosen from the extension")
+    parser.add_argument("--recognizer", default="gemini", help="gemini, stub or module:function")
+    parser.add_argument("--labels", help="CSV with path and pokemon columns, to measure accuracy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="preprocessing processes")
+    parser.add_argument("--concurrency", type=int, default=settings.GEMINI_MAX_CONCURRENCY, help="recognitions in flight")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="images held in memory at once")
+    parser.add_argument("--no-resolve", action="store_true", help="do not look names up in PokeAPI")
+    asyncio.run(main(parser.parse_args()))
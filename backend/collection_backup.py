@@ -0,0 +1,42 @@
+"""
+Admin job: stream every user's collection to/from an NDJSON file
+Usage (from the backend directory):
+    python collection_backup.py export collections.ndjson
+    python collection_backup.py import collections.ndjson
+"""
+import asyncio
+import sys
+from app.services.collection_transfer import export_ndjson, import_ndjson
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+async def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def export_all(path: str):
+    written = 0
+    with open(path, "wb") as f:
+        async for chunk in export_ndjson(user_id=None, include_data=False):
+            f.write(chunk)
+            written += len(chunk)
+    print(f"Exported {written} bytes to {path}")
+
+
+async def import_all(path: str):
+    summary = await import_ndjson(read_chunks(path), user_id=None)
+    print(f"Imported {path}: {summary}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "import"):
+        print(__doc__)
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    asyncio.run(export_all(path) if command == "export" else import_all(path))
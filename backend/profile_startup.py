@@ -0,0 +1,72 @@
+"""
+Startup profiler: import time of app.main, broken down per module
+Run from the backend directory: python profile_startup.py [--top 25] [--budget-ms 800] [--module app.main]
+
+Imports the module in a fresh interpreter with -X importtime, so nothing is
+cached in this process. With --budget-ms the script exits with status 1 when
+the total import time exceeds the budget (for use in CI).
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def measure(module: str):
+    """Import module in a child interpreter and return [(depth, name, self_us, cumulative_us)]"""
+    env = dict(os.environ, DB_ECHO="false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25, help="number of modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when the total exceeds this")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cum for depth, name, _, cum in rows if name == args.module) / 1000
+
+    # Self time grouped by top-level package shows which dependency costs the most
+    by_package = defaultdict(int)
+    for _, name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Import of {args.module}: {total_ms:.0f} ms ({len(rows)} modules)\n")
+    print("By package (self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f} ms  {package}")
+
+    print("\nBy module (cumulative time, includes imports it triggered):")
+    for depth, name, _, cum in sorted(rows, key=lambda row: -row[3])[:args.top]:
+        print(f"  {cum / 1000:>8.1f} ms  {name}")
+
+    if args.budget_ms is not None:
+        if total_ms > args.budget_ms:
+            print(f"\nFAIL: {total_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+            sys.exit(1)
+        print(f"\nOK: within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()